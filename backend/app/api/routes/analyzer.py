@@ -5,37 +5,164 @@ This module implements the main analysis endpoints following RESTful principles
 and demonstrates proper error handling and response formatting.
 """
 
+import os
 import time
-from typing import Dict, Any
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from fastapi.responses import JSONResponse
+import asyncio
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Dict, Any, Hashable, Optional
+import httpx
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 
 from app.models.schemas import (
     AnalysisRequest, 
     AnalysisResponse, 
     ErrorResponse,
-    Examples
+    ANALYSIS_REQUEST_EXAMPLE,
+    ANALYSIS_RESPONSE_EXAMPLE
 )
-from app.core.config import get_settings, Settings
+from app.core.config import get_settings
+from app.services.ai_service import UNAVAILABLE_MODEL
 from app.services.analyzer_service import AnalyzerService
+from app.services.request_batcher import AnalysisBatcher
+from app.services.semantic_cache import SemanticCache, get_semantic_cache
 from app.utils.exceptions import (
+    AnalyzerBaseException,
     DocumentProcessingError,
     AIServiceError,
-    ValidationError
+    ValidationError,
+    format_error_response
 )
 
-# Create router instance
-router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# Dependency injection for settings
-def get_analyzer_service(settings: Settings = Depends(get_settings)) -> AnalyzerService:
+# Create router instance; responses are rendered with orjson
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Static endpoint payloads, serialized once at import
+SUPPORTED_FILINGS = {
+    "supported_types": [
+        {
+            "code": "10-K",
+            "name": "Annual Report",
+            "description": "Comprehensive annual business and financial report"
+        },
+        {
+            "code": "10-Q", 
+            "name": "Quarterly Report",
+            "description": "Quarterly financial report"
+        },
+        {
+            "code": "8-K",
+            "name": "Current Report", 
+            "description": "Report of triggering events or corporate changes"
+        },
+        {
+            "code": "20-F",
+            "name": "Foreign Annual Report",
+            "description": "Annual report for foreign companies"
+        },
+        {
+            "code": "DEF 14A",
+            "name": "Proxy Statement",
+            "description": "Shareholder meeting proxy statement"
+        }
+    ],
+    "capabilities": [
+        "Financial data extraction",
+        "Risk factor analysis", 
+        "Management discussion analysis",
+        "Balance sheet information",
+        "Income statement data",
+        "Cash flow analysis"
+    ]
+}
+
+EXAMPLES = {
+    "example_questions": [
+        "What were the total revenues for Q3 2024?",
+        "What are the main risk factors mentioned in this filing?",
+        "What is the company's current cash and cash equivalents?",
+        "How much did the company spend on research and development?",
+        "What was the net income for the reporting period?",
+        "What are the company's largest operating expenses?",
+        "What new acquisitions or investments were made?",
+        "What is management's outlook for the next quarter?",
+        "What legal proceedings is the company involved in?",
+        "What were the earnings per share for this period?"
+    ],
+    "sample_request": dict(ANALYSIS_REQUEST_EXAMPLE),
+    "sample_response_format": dict(ANALYSIS_RESPONSE_EXAMPLE),
+    "tips": [
+        "Be specific in your questions for better results",
+        "Reference specific time periods when asking about financial data", 
+        "Ask about specific line items for detailed financial information",
+        "Questions about trends work well with multiple period comparisons"
+    ]
+}
+
+_SUPPORTED_FILINGS_BODY = orjson.dumps(SUPPORTED_FILINGS)
+_EXAMPLES_BODY = orjson.dumps(EXAMPLES)
+
+# Dependency injection for the analyzer service
+def get_analyzer_service(http_request: Request) -> AnalyzerService:
     """
     Dependency injection for analyzer service.
     
     This follows the Dependency Inversion Principle by injecting the service
-    rather than creating it directly in the route handlers.
+    rather than creating it directly in the route handlers. The service is
+    built once so the embedding model, ChromaDB client and Gemini client are
+    loaded once and reused by every request. SEC fetches go through the
+    application's pooled HTTP client.
+    """
+    return _shared_analyzer_service(getattr(http_request.app.state, "http_client", None))
+
+
+@lru_cache(maxsize=1)
+def _shared_analyzer_service(http_client: Optional[httpx.AsyncClient]) -> AnalyzerService:
+    """Build the process-wide analyzer service around the given HTTP client."""
+    return AnalyzerService(get_settings(), http_client=http_client)
+
+
+async def warm_up_analyzer_service(http_client: Optional[httpx.AsyncClient]) -> AnalyzerService:
+    """
+    Build the shared analyzer service and load its models before serving.
+    
+    Args:
+        http_client: The application's pooled HTTP client
+        
+    Returns:
+        The shared analyzer service, ready to handle requests
     """
-    return AnalyzerService(settings)
+    analyzer = _shared_analyzer_service(http_client)
+    await analyzer.initialize()
+    return analyzer
+
+
+def get_analysis_batcher(
+    analyzer: AnalyzerService = Depends(get_analyzer_service)
+) -> AnalysisBatcher:
+    """
+    Dependency injection for the request batcher.
+    
+    One batcher wraps the shared analyzer service so concurrent requests
+    for the same filing can be coalesced.
+    """
+    return _shared_analysis_batcher(analyzer)
+
+
+@lru_cache(maxsize=1)
+def _shared_analysis_batcher(analyzer: AnalyzerService) -> AnalysisBatcher:
+    """Build the process-wide request batcher for the analyzer service."""
+    settings = get_settings()
+    return AnalysisBatcher(
+        analyzer,
+        max_batch_size=settings.batch_max_size,
+        max_queue_time=settings.batch_max_wait_ms / 1000
+    )
 
 
 @router.post(
@@ -46,7 +173,7 @@ def get_analyzer_service(settings: Settings = Depends(get_settings)) -> Analyzer
             "description": "Successful analysis",
             "content": {
                 "application/json": {
-                    "example": Examples.ANALYSIS_RESPONSE
+                    "example": dict(ANALYSIS_RESPONSE_EXAMPLE)
                 }
             }
         },
@@ -81,16 +208,32 @@ def get_analyzer_service(settings: Settings = Depends(get_settings)) -> Analyzer
 )
 async def analyze_filing(
     request: AnalysisRequest,
+    http_request: Request,
+    response: Response,
     background_tasks: BackgroundTasks,
-    analyzer: AnalyzerService = Depends(get_analyzer_service)
+    analyzer: AnalyzerService = Depends(get_analyzer_service),
+    semantic_cache: SemanticCache = Depends(get_semantic_cache),
+    batcher: AnalysisBatcher = Depends(get_analysis_batcher)
 ) -> AnalysisResponse:
     """
     Analyze a SEC filing and answer questions about it.
     
+    Semantically equivalent questions about the same filing are served
+    from the semantic cache without running the analysis pipeline.
+    Concurrent questions about the same filing are batched into one
+    Gemini call. Responses carry an ETag derived from the request, and a
+    matching If-None-Match header is answered with 304 Not Modified.
+    Session responses depend on the conversation so far and are sent with
+    Cache-Control: no-store instead.
+    
     Args:
         request: Analysis request containing filing URL and question
+        http_request: Raw HTTP request, used for conditional headers
+        response: Outgoing response, used to attach caching headers
         background_tasks: FastAPI background tasks for cleanup
         analyzer: Injected analyzer service
+        semantic_cache: Injected semantic cache
+        batcher: Injected request batcher
         
     Returns:
         AnalysisResponse: AI-generated analysis results
@@ -98,22 +241,63 @@ async def analyze_filing(
     Raises:
         HTTPException: For various error conditions
     """
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
+    
+    if request.session_id:
+        # Session answers depend on earlier turns, so clients must not reuse them
+        response.headers["Cache-Control"] = "no-store"
+    else:
+        # Repeated identical requests are answered from the client's cache
+        etag = _analysis_etag(request)
+        caching_headers = {
+            "ETag": etag,
+            "Cache-Control": f"private, max-age={get_settings().analysis_cache_max_age}"
+        }
+        if _etag_matches(http_request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=caching_headers)
+        response.headers.update(caching_headers)
     
     try:
-        # Perform the analysis
-        result = await analyzer.analyze_filing(
-            filing_url=str(request.filing_url),
-            question=request.question,
-            filing_type=request.filing_type,
-            include_context=request.include_context,
-            max_response_length=request.max_response_length
-        )
+        # Session answers depend on earlier turns, so they bypass the shared
+        # semantic cache and request batching
+        if request.session_id:
+            result = await analyzer.analyze_filing(
+                filing_url=str(request.filing_url),
+                question=request.question,
+                filing_type=request.filing_type,
+                include_context=request.include_context,
+                max_response_length=request.max_response_length,
+                session_id=request.session_id
+            )
+            result.processing_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            background_tasks.add_task(
+                _cleanup_temporary_files,
+                analyzer.get_temp_files()
+            )
+            return result
+        
+        # Serve semantically equivalent questions from the cache
+        cache_bucket = _semantic_cache_bucket(request)
+        question_embedding = await analyzer.embed_question(request.question)
+        cached_result = semantic_cache.get(cache_bucket, question_embedding)
+        
+        if cached_result is not None:
+            return cached_result.model_copy(update={
+                "question": request.question,
+                "processing_time_ms": (time.perf_counter_ns() - start_ns) // 1_000_000
+            })
+        
+        # Perform the analysis, batched with concurrent requests
+        result = await batcher.process(request)
         
         # Calculate processing time
-        processing_time_ms = int((time.time() - start_time) * 1000)
+        processing_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
         result.processing_time_ms = processing_time_ms
         
+        # Placeholder answers given while Gemini is unavailable are not cached
+        if result.ai_model_info.llm != UNAVAILABLE_MODEL:
+            semantic_cache.put(cache_bucket, question_embedding, result)
+        
         # Schedule cleanup tasks in background
         background_tasks.add_task(
             _cleanup_temporary_files,
@@ -152,9 +336,9 @@ async def analyze_filing(
             }
         )
         
-    except Exception as e:
+    except Exception:
         # Log the full error for debugging
-        print(f"Unexpected error in analyze_filing: {str(e)}")
+        logger.exception("Unexpected error in analyze_filing")
         
         raise HTTPException(
             status_code=500,
@@ -166,55 +350,73 @@ async def analyze_filing(
         )
 
 
+@router.post(
+    "/analyze/stream",
+    summary="Analyze SEC Filing (Streaming)",
+    description="""
+    Analyze a SEC filing and stream the answer as Server-Sent Events.
+    
+    Each event is a `data:` line with a JSON object:
+    - `{"event": "answer", "text": "..."}` for every generated text fragment
+    - `{"event": "complete", "response": {...}}` with the full analysis response
+    - `{"event": "error", ...}` if the analysis fails after streaming started
+    """
+)
+async def analyze_filing_stream(
+    request: AnalysisRequest,
+    analyzer: AnalyzerService = Depends(get_analyzer_service)
+) -> StreamingResponse:
+    """
+    Analyze a SEC filing and stream the answer as it is generated.
+    
+    Args:
+        request: Analysis request containing filing URL and question
+        analyzer: Injected analyzer service
+        
+    Returns:
+        StreamingResponse: Server-Sent Events stream of analysis events
+    """
+    async def event_stream():
+        try:
+            async for event in analyzer.stream_analyze_filing(
+                filing_url=str(request.filing_url),
+                question=request.question,
+                filing_type=request.filing_type,
+                include_context=request.include_context,
+                max_response_length=request.max_response_length
+            ):
+                yield f"data: {orjson.dumps(event).decode()}\n\n"
+                
+        except AnalyzerBaseException as e:
+            error = {"event": "error", **format_error_response(e)}
+            yield f"data: {orjson.dumps(error).decode()}\n\n"
+            
+        except Exception:
+            logger.exception("Unexpected error in analyze_filing_stream")
+            error = {
+                "event": "error",
+                "error": "Internal Server Error",
+                "message": "An unexpected error occurred during analysis",
+                "details": None
+            }
+            yield f"data: {orjson.dumps(error).decode()}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.get(
     "/supported-filings",
     summary="Get Supported Filing Types",
     description="Returns a list of SEC filing types supported by the analyzer"
 )
-async def get_supported_filings() -> Dict[str, Any]:
+async def get_supported_filings() -> Response:
     """
     Get information about supported SEC filing types.
     
     Returns:
-        Dict containing supported filing types and their descriptions
+        JSON response with supported filing types and their descriptions
     """
-    return {
-        "supported_types": [
-            {
-                "code": "10-K",
-                "name": "Annual Report",
-                "description": "Comprehensive annual business and financial report"
-            },
-            {
-                "code": "10-Q", 
-                "name": "Quarterly Report",
-                "description": "Quarterly financial report"
-            },
-            {
-                "code": "8-K",
-                "name": "Current Report", 
-                "description": "Report of triggering events or corporate changes"
-            },
-            {
-                "code": "20-F",
-                "name": "Foreign Annual Report",
-                "description": "Annual report for foreign companies"
-            },
-            {
-                "code": "DEF 14A",
-                "name": "Proxy Statement",
-                "description": "Shareholder meeting proxy statement"
-            }
-        ],
-        "capabilities": [
-            "Financial data extraction",
-            "Risk factor analysis", 
-            "Management discussion analysis",
-            "Balance sheet information",
-            "Income statement data",
-            "Cash flow analysis"
-        ]
-    }
+    return Response(content=_SUPPORTED_FILINGS_BODY, media_type="application/json")
 
 
 @router.get(
@@ -222,35 +424,14 @@ async def get_supported_filings() -> Dict[str, Any]:
     summary="Get Example Queries",
     description="Returns example questions and expected response formats"
 )
-async def get_examples() -> Dict[str, Any]:
+async def get_examples() -> Response:
     """
     Get example queries and responses for API testing.
     
     Returns:
-        Dict containing example requests and responses
+        JSON response with example requests and responses
     """
-    return {
-        "example_questions": [
-            "What were the total revenues for Q3 2024?",
-            "What are the main risk factors mentioned in this filing?",
-            "What is the company's current cash and cash equivalents?",
-            "How much did the company spend on research and development?",
-            "What was the net income for the reporting period?",
-            "What are the company's largest operating expenses?",
-            "What new acquisitions or investments were made?",
-            "What is management's outlook for the next quarter?",
-            "What legal proceedings is the company involved in?",
-            "What were the earnings per share for this period?"
-        ],
-        "sample_request": Examples.ANALYSIS_REQUEST,
-        "sample_response_format": Examples.ANALYSIS_RESPONSE,
-        "tips": [
-            "Be specific in your questions for better results",
-            "Reference specific time periods when asking about financial data", 
-            "Ask about specific line items for detailed financial information",
-            "Questions about trends work well with multiple period comparisons"
-        ]
-    }
+    return Response(content=_EXAMPLES_BODY, media_type="application/json")
 
 
 @router.get(
@@ -336,22 +517,70 @@ async def clear_vector_database(
         }
 
 
+def _analysis_etag(request: AnalysisRequest) -> str:
+    """
+    Build a strong ETag for an analysis request.
+    
+    Analysis results are deterministic for the same request parameters
+    within the cache lifetime, so the ETag is a hash of the request itself.
+    """
+    payload = orjson.dumps(request.model_dump(mode="json"), option=orjson.OPT_SORT_KEYS)
+    return f'"{hashlib.blake2b(payload, digest_size=16).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check whether an If-None-Match header matches the given ETag."""
+    if not if_none_match:
+        return False
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(
+        candidate == "*" or candidate.replace("W/", "", 1) == etag
+        for candidate in candidates
+    )
+
+
+def _semantic_cache_bucket(request: AnalysisRequest) -> Hashable:
+    """
+    Build the semantic cache bucket for an analysis request.
+    
+    Requests only share cached answers when they target the same filing
+    with the same response options.
+    """
+    return (
+        str(request.filing_url),
+        request.filing_type,
+        request.include_context,
+        request.max_response_length
+    )
+
+
 async def _cleanup_temporary_files(temp_files: list) -> None:
     """
     Background task to clean up temporary files.
     
+    Removals run concurrently on the default thread pool so the event
+    loop never blocks on filesystem calls.
+    
     Args:
         temp_files: List of temporary file paths to clean up
     """
-    import os
+    results = await asyncio.gather(
+        *(asyncio.to_thread(_safe_unlink, file_path) for file_path in temp_files),
+        return_exceptions=True
+    )
     
-    for file_path in temp_files:
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        except Exception as e:
-            # Log but don't fail on cleanup errors
-            print(f"Warning: Failed to cleanup temporary file {file_path}: {e}")
+    for file_path, result in zip(temp_files, results):
+        # Log but don't fail on cleanup errors
+        if isinstance(result, Exception):
+            logger.warning("Failed to cleanup temporary file %s: %s", file_path, result)
+
+
+def _safe_unlink(file_path: str) -> None:
+    """Remove a file, treating an already missing file as cleaned up."""
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
 
 
 # Note: Exception handlers should be added to the main FastAPI app, not individual routers 
\ No newline at end of file
@@ -8,7 +8,8 @@ providing a clean interface for application settings.
 import os
 from functools import lru_cache
 from typing import Optional
-from pydantic_settings import BaseSettings
+from dotenv import dotenv_values
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
 
@@ -18,48 +19,86 @@ class Settings(BaseSettings):
     
     This class demonstrates proper configuration management
     and environment variable handling for production applications.
+    Field names map to upper-case environment variables (e.g.
+    ``chunk_size`` <- ``CHUNK_SIZE``).
     """
     
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        extra="ignore"  # Ignore extra environment variables
+    )
+    
     # Application settings
-    app_name: str = Field(default="AI SEC Filing Analyzer", env="APP_NAME")
-    debug: bool = Field(default=False, env="DEBUG")
-    version: str = Field(default="1.0.0", env="VERSION")
+    app_name: str = Field(default="AI SEC Filing Analyzer")
+    debug: bool = Field(default=False)
+    version: str = Field(default="1.0.0")
     
     # Google Gemini API configuration
-    google_api_key: Optional[str] = Field(default=None, env="GOOGLE_API_KEY")
-    gemini_model: str = Field(default="gemini-2.5-flash", env="GEMINI_MODEL")
+    google_api_key: Optional[str] = Field(default=None)
+    gemini_model: str = Field(default="gemini-2.5-flash")
+    gemini_cache_ttl: int = Field(default=3600)
+    gemini_cache_size: int = Field(default=32)
+    gemini_concurrency: int = Field(default=8)
+    gemini_warmup: bool = Field(default=True)
+    max_input_tokens: int = Field(default=8000)
     
     # Hugging Face configuration
-    hf_model_name: str = Field(
-        default="sentence-transformers/all-MiniLM-L6-v2", 
-        env="HF_MODEL_NAME"
-    )
+    hf_model_name: str = Field(default="sentence-transformers/all-MiniLM-L6-v2")
+    embedding_backend: str = Field(default="onnx-int8")
+    embedding_onnx_path: str = Field(default="./models/embeddings-int8")
+    embed_concurrency: int = Field(default=2)
+    torch_threads: Optional[int] = Field(default=None)
+    embed_batch_size: Optional[int] = Field(default=None)
+    query_embedding_cache_size: int = Field(default=1024)
+    embedding_cache_dir: str = Field(default="./embedding_cache")
+    hnsw_m: int = Field(default=32)
+    hnsw_ef_construction: int = Field(default=200)
+    hnsw_ef_search: int = Field(default=64)
     
     # Vector database settings
-    vector_db_path: str = Field(default="./chroma_db", env="VECTOR_DB_PATH")
-    collection_name: str = Field(default="sec_filings", env="COLLECTION_NAME")
+    vector_db_path: str = Field(default="./chroma_db")
+    collection_name: str = Field(default="sec_filings")
     
     # Document processing settings
-    chunk_size: int = Field(default=1000, env="CHUNK_SIZE")
-    chunk_overlap: int = Field(default=200, env="CHUNK_OVERLAP")
-    max_chunks: int = Field(default=100, env="MAX_CHUNKS")
+    chunk_size: int = Field(default=1000)
+    chunk_overlap: int = Field(default=200)
+    max_chunks: int = Field(default=100)
+    filing_cache_size: int = Field(default=64)
+    filing_cache_ttl: int = Field(default=3600)
+    filing_http_cache_dir: str = Field(default="./filing_cache")
+    format_hedge_delay: float = Field(default=2.0)
     
     # API settings
-    max_response_length: int = Field(default=4000, env="MAX_RESPONSE_LENGTH")
-    request_timeout: int = Field(default=60, env="REQUEST_TIMEOUT")
+    max_response_length: int = Field(default=4000)
+    request_timeout: int = Field(default=60)
+    analysis_cache_max_age: int = Field(default=300)
     
-    # Security settings  
-    allowed_origins: str = Field(
-        default="http://localhost:3000,http://127.0.0.1:3000",
-        env="ALLOWED_ORIGINS"
-    )
+    # LLM response cache settings
+    llm_cache_dir: str = Field(default="./llm_cache")
+    llm_cache_ttl: int = Field(default=86400)
     
-    class Config:
-        """Pydantic configuration."""
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
-        extra = "ignore"  # Ignore extra environment variables
+    # Conversation session settings
+    history_window_tokens: int = Field(default=2048)
+    session_cache_size: int = Field(default=1024)
+    session_ttl: int = Field(default=3600)
+    
+    # Semantic cache settings
+    semantic_cache_threshold: float = Field(default=0.95)
+    semantic_cache_size: int = Field(default=10000)
+    retrieval_cache_threshold: float = Field(default=0.97)
+    retrieval_cache_size: int = Field(default=512)
+    
+    # Request batching settings
+    batch_max_size: int = Field(default=8)
+    batch_max_wait_ms: int = Field(default=50)
+    
+    # Extractive fast path settings
+    enable_fast_path: bool = Field(default=False)
+    
+    # Security settings  
+    allowed_origins: str = Field(default="http://localhost:3000,http://127.0.0.1:3000")
     
     def get_allowed_origins_list(self) -> list[str]:
         """Convert comma-separated origins string to list."""
@@ -85,17 +124,35 @@ def get_settings() -> Settings:
     Get application settings with caching.
     
     This function uses LRU cache to ensure settings are loaded once
-    and reused throughout the application lifecycle.
+    and reused throughout the application lifecycle. The ``.env`` file
+    and process environment are read in a single pass and validated
+    directly, instead of going through the per-field settings sources.
     
     Returns:
         Settings: Application configuration object
     """
-    environment = os.getenv("ENVIRONMENT", "development").lower()
+    env = _read_environment()
     
-    if environment == "production":
-        return ProductionSettings()
+    if env.get("environment", "development").lower() == "production":
+        return ProductionSettings.model_validate(env)
     else:
-        return DevelopmentSettings()
+        return DevelopmentSettings.model_validate(env)
+
+
+def _read_environment() -> dict:
+    """
+    Snapshot configuration values from ``.env`` and the process environment.
+    
+    Keys are lower-cased to match field names; process environment
+    variables take precedence over the ``.env`` file.
+    
+    Returns:
+        dict: Lower-cased configuration values
+    """
+    config = Settings.model_config
+    values = dotenv_values(config["env_file"], encoding=config["env_file_encoding"])
+    values.update(os.environ)
+    return {key.lower(): value for key, value in values.items() if value is not None}
 
 
 def validate_settings(settings: Settings) -> None:
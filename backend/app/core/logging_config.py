@@ -0,0 +1,71 @@
+"""
+Logging configuration for AI SEC Filing Analyzer.
+
+Log records are handed to a queue on the calling thread and formatted and
+written by a background listener, so logging never blocks the event loop.
+"""
+
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional
+
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+def setup_logging(debug: bool = False) -> logging.handlers.QueueListener:
+    """
+    Route root logger output through a background queue listener.
+
+    Calling this again returns the listener that is already running.
+
+    Args:
+        debug: Whether to log at DEBUG instead of INFO level
+
+    Returns:
+        QueueListener: Running listener that writes records to stderr
+    """
+    global _listener, _queue_handler
+
+    if _listener is not None:
+        return _listener
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.DEBUG if debug else logging.INFO)
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    root_logger.addHandler(_queue_handler)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """
+    Detach the queue handler from the root logger, then flush queued
+    records and stop the background listener.
+
+    Records logged afterwards are no longer sent to a queue nobody drains,
+    and a later setup_logging call starts from a clean root logger.
+    """
+    global _listener, _queue_handler
+
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -5,12 +5,22 @@ This module defines all request/response schemas with proper validation,
 demonstrating professional API design and data validation practices.
 """
 
+import re
 from datetime import datetime
+from types import MappingProxyType
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, HttpUrl, validator
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl, field_validator
 from enum import Enum
 
 
+# Words that are not allowed in questions, matched case-insensitively in one scan
+PROHIBITED_WORDS = ("hack", "exploit", "bypass", "jailbreak")
+_PROHIBITED_WORDS_RE = re.compile("|".join(PROHIBITED_WORDS), re.IGNORECASE)
+
+# SEC filing URLs must reference sec.gov or EDGAR, checked in one scan
+_SEC_URL_RE = re.compile(r"sec\.gov|edgar", re.IGNORECASE)
+
+
 class FilingType(str, Enum):
     """Enumeration of supported SEC filing types."""
     FORM_10K = "10-K"
@@ -26,9 +36,12 @@ class AnalysisRequest(BaseModel):
     Request model for SEC filing analysis.
     
     This model validates incoming requests and ensures proper data types
-    and constraints for the analysis endpoint.
+    and constraints for the analysis endpoint. Requests are immutable and
+    hashable, and string fields are stripped by pydantic-core.
     """
     
+    model_config = ConfigDict(str_strip_whitespace=True, frozen=True)
+    
     filing_url: HttpUrl = Field(
         ...,
         description="URL to the SEC filing document",
@@ -60,26 +73,33 @@ class AnalysisRequest(BaseModel):
         description="Maximum length of the AI response"
     )
     
-    @validator('filing_url')
-    def validate_sec_url(cls, v):
+    session_id: Optional[str] = Field(
+        default=None,
+        min_length=1,
+        max_length=128,
+        description="Optional session identifier; earlier questions in the same session are used as conversation history"
+    )
+    
+    @field_validator('filing_url', mode='after')
+    @classmethod
+    def validate_sec_url(cls, v: HttpUrl) -> HttpUrl:
         """Validate that the URL appears to be a valid SEC filing URL."""
-        url_str = str(v)
-        if not ("sec.gov" in url_str.lower() or "edgar" in url_str.lower()):
+        if not _SEC_URL_RE.search(str(v)):
             raise ValueError("URL must be a valid SEC filing URL")
         return v
     
-    @validator('question')
-    def validate_question(cls, v):
+    @field_validator('question', mode='after')
+    @classmethod
+    def validate_question(cls, v: str) -> str:
         """Validate question content and format."""
-        if not v.strip():
+        if not v:
             raise ValueError("Question cannot be empty")
         
         # Check for potentially problematic content
-        prohibited_words = ["hack", "exploit", "bypass", "jailbreak"]
-        if any(word in v.lower() for word in prohibited_words):
+        if _PROHIBITED_WORDS_RE.search(v):
             raise ValueError("Question contains prohibited content")
         
-        return v.strip()
+        return v
 
 
 class DocumentChunk(BaseModel):
@@ -103,6 +123,33 @@ class DocumentChunk(BaseModel):
     )
 
 
+class FilingInfo(BaseModel):
+    """Information about an analyzed filing, immutable once built."""
+    
+    model_config = ConfigDict(frozen=True)
+    
+    url: str = Field(..., description="URL of the analyzed filing")
+    type: str = Field(default="Unknown", description="Requested filing type")
+    company_name: str = Field(default="Unknown", description="Company name")
+    form_type: str = Field(default="Unknown", description="Form type found in the filing")
+    filing_date: str = Field(default="Unknown", description="Filing date")
+    chunks_processed: int = Field(default=0, description="Number of chunks processed")
+    chunks_used_for_context: int = Field(default=0, description="Number of chunks used as context")
+
+
+class AIModelInfo(BaseModel):
+    """Information about the AI models used for an analysis."""
+    
+    model_config = ConfigDict(frozen=True)
+    
+    llm: str = Field(..., description="Language model that generated the answer")
+    embeddings: str = Field(..., description="Embedding model used for retrieval")
+    vector_db: str = Field(
+        default="FAISS HNSW-SQ8 index over ChromaDB",
+        description="Vector index used for retrieval and the store it indexes"
+    )
+
+
 class AnalysisResponse(BaseModel):
     """
     Response model for SEC filing analysis.
@@ -121,8 +168,8 @@ class AnalysisResponse(BaseModel):
         description="Confidence score of the analysis (0-1)"
     )
     
-    filing_info: Dict[str, Any] = Field(
-        default_factory=dict,
+    filing_info: FilingInfo = Field(
+        ...,
         description="Information about the analyzed filing"
     )
     
@@ -141,8 +188,8 @@ class AnalysisResponse(BaseModel):
         description="Timestamp when the analysis was completed"
     )
     
-    ai_model_info: Dict[str, str] = Field(
-        default_factory=dict,
+    ai_model_info: AIModelInfo = Field(
+        ...,
         description="Information about the AI models used"
     )
 
@@ -188,32 +235,33 @@ class FilingMetadata(BaseModel):
     processed_chunks: Optional[int] = Field(default=None, description="Number of chunks processed")
 
 
-# Example data for API documentation
-class Examples:
-    """Example data for API documentation and testing."""
-    
-    ANALYSIS_REQUEST = {
-        "filing_url": "https://www.sec.gov/Archives/edgar/data/320193/000032019324000081/aapl-20240630.htm",
-        "question": "What were the total net sales for the third quarter of 2024?",
-        "filing_type": "10-Q",
-        "include_context": True,
-        "max_response_length": 2000
+# Example data for API documentation and testing, read-only and built once
+ANALYSIS_REQUEST_EXAMPLE = MappingProxyType({
+    "filing_url": "https://www.sec.gov/Archives/edgar/data/320193/000032019324000081/aapl-20240630.htm",
+    "question": "What were the total net sales for the third quarter of 2024?",
+    "filing_type": "10-Q",
+    "include_context": True,
+    "max_response_length": 2000
+})
+
+ANALYSIS_RESPONSE_EXAMPLE = MappingProxyType({
+    "question": "What were the total net sales for the third quarter of 2024?",
+    "answer": "According to the 10-Q filing, Apple's total net sales for the third quarter of 2024 were $85.8 billion, representing a 5% increase compared to the same quarter in the previous year.",
+    "confidence_score": 0.92,
+    "filing_info": {
+        "url": "https://www.sec.gov/Archives/edgar/data/320193/000032019324000081/aapl-20240630.htm",
+        "type": "10-Q",
+        "company_name": "Apple Inc.",
+        "form_type": "10-Q",
+        "filing_date": "2024-08-01",
+        "chunks_processed": 100,
+        "chunks_used_for_context": 8
+    },
+    "relevant_chunks": [],
+    "processing_time_ms": 1250,
+    "ai_model_info": {
+        "llm": "gemini-1.5-flash",
+        "embeddings": "sentence-transformers/all-MiniLM-L6-v2",
+        "vector_db": "FAISS HNSW-SQ8 index over ChromaDB"
     }
-    
-    ANALYSIS_RESPONSE = {
-        "question": "What were the total net sales for the third quarter of 2024?",
-        "answer": "According to the 10-Q filing, Apple's total net sales for the third quarter of 2024 were $85.8 billion, representing a 5% increase compared to the same quarter in the previous year.",
-        "confidence_score": 0.92,
-        "filing_info": {
-            "company_name": "Apple Inc.",
-            "filing_type": "10-Q",
-            "filing_date": "2024-08-01",
-            "period_end_date": "2024-06-30"
-        },
-        "relevant_chunks": [],
-        "processing_time_ms": 1250,
-        "ai_model_info": {
-            "llm": "gemini-1.5-flash",
-            "embeddings": "sentence-transformers/all-MiniLM-L6-v2"
-        }
-    } 
\ No newline at end of file
+})
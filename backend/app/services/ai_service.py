@@ -5,13 +5,200 @@ This service handles interactions with Google's Gemini AI model
 for SEC filing analysis and question answering.
 """
 
+import re
+import json
+import asyncio
+import time
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional
+import datetime
+import weakref
+from functools import lru_cache
+from typing import Dict, Any, List, NamedTuple, Optional, AsyncIterator, Tuple, Union
+import diskcache
+from cachetools import TTLCache
 import google.generativeai as genai
+from google.generativeai import caching
 from langchain_core.documents import Document
 
 from app.utils.exceptions import AIServiceError
+from app.utils.tokens import estimate_tokens
 from app.core.config import Settings
+from app.services.fast_path import extract_answer
+
+logger = logging.getLogger(__name__)
+
+
+# Gemini only accepts explicit context caches above a minimum token count
+MIN_CACHE_TOKENS = 2048
+
+
+# Phrases signalling an uncertain answer, matched case-insensitively in one scan
+UNCERTAINTY_PHRASES = (
+    "not available", "not provided", "unclear", "cannot determine",
+    "insufficient information", "not specified", "unknown"
+)
+_UNCERTAINTY_RE = re.compile("|".join(map(re.escape, UNCERTAINTY_PHRASES)), re.IGNORECASE)
+
+# Dollar amounts, percentages and ISO dates indicate concrete information
+_CONCRETE_DATA_RE = re.compile(r"\$[\d,]+|\d+%|\d{4}-\d{2}-\d{2}")
+
+# Health probes are cached for this many seconds and time out after HEALTH_CHECK_TIMEOUT
+HEALTH_CHECK_TTL = 30
+HEALTH_CHECK_TIMEOUT = 5
+
+# Estimated tokens taken by the prompt template and question around the context
+PROMPT_OVERHEAD_TOKENS = 512
+
+# Context of prompts sent to a model bound to the filing's explicit context
+# cache, which already holds the full filing text; the retrieved excerpts
+# would only repeat it
+CACHED_FILING_CONTEXT = (
+    "The complete SEC filing is provided in the cached content above. "
+    "Treat it as the filing excerpts referred to below."
+)
+
+# Filing metadata fields included in the prompt context
+_FILING_HEADER_KEYS = frozenset(("company_name", "form_type", "filing_date", "source_url"))
+
+
+# Static prompt scaffold; the prefix is byte-identical across requests so
+# Gemini can reuse it from its prompt cache
+ANALYSIS_PROMPT_PREFIX = """You are an expert financial analyst specializing in SEC filings. You help investors and analysts understand complex financial documents by providing accurate, detailed, and insightful analysis.
+
+CONTEXT:
+"""
+
+ANALYSIS_PROMPT_SUFFIX = """
+
+{history}QUESTION: {question}
+
+INSTRUCTIONS:
+1. Analyze the provided SEC filing excerpts carefully
+2. Answer the question based ONLY on the information provided in the context
+3. If the information isn't available in the context, clearly state that
+4. Provide specific details, numbers, and quotes when available
+5. Be precise and professional in your response
+6. {length_instruction}Structure your response clearly with relevant headings if needed
+
+IMPORTANT GUIDELINES:
+- Only use information from the provided context
+- Quote specific excerpts when making claims
+- If asking about financial numbers, provide exact figures when available
+- Explain financial terminology when necessary
+- Highlight any limitations in the available data
+
+RESPONSE:"""
+
+
+class _ContextCaches(TTLCache):
+    """
+    Gemini context caches keyed by SHA-256 of the filing URL.
+    
+    Values are (CachedContent, GenerativeModel) pairs. Entries pushed out by
+    the size bound still hold storage on Gemini until their remote TTL runs
+    out, so their caches are collected in ``evicted`` for deletion.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evicted: List[Any] = []
+    
+    def popitem(self):
+        key, value = super().popitem()
+        self.evicted.append(value[0])
+        return key, value
+    
+    def take_evicted(self) -> List[Any]:
+        """Return the evicted caches awaiting deletion and forget them."""
+        evicted, self.evicted = self.evicted, []
+        return evicted
+    
+    def drain(self) -> List[Any]:
+        """Remove every entry and return all caches awaiting deletion."""
+        caches = self.take_evicted()
+        for key in list(self):
+            caches.append(self.pop(key)[0])
+        return caches
+
+
+def _delete_context_caches(caches: List[Any]) -> None:
+    """Delete Gemini context caches; blocking, run in a worker thread."""
+    for cache in caches:
+        try:
+            cache.delete()
+        except Exception as e:
+            logger.warning("Failed to delete Gemini context cache %s: %s", cache.name, e)
+
+
+# Model name reported when Gemini is not configured; such results must not be cached
+UNAVAILABLE_MODEL = "unavailable"
+
+
+class AIResult(NamedTuple):
+    """Result of analyzing one question with Gemini."""
+    
+    answer: str
+    confidence_score: float
+    context_used: Tuple[Dict[str, Any], ...]
+    model: str
+    provider: str
+
+
+@lru_cache(maxsize=128)
+def _format_filing_header(items: Tuple[Tuple[str, Any], ...]) -> str:
+    """Format the filing information block that precedes the excerpts."""
+    lines = "".join(f"- {key.replace('_', ' ').title()}: {value}\n" for key, value in items)
+    return f"FILING INFORMATION:\n{lines}\n"
+
+
+@lru_cache()
+def get_gemini_model(api_key: str, model_name: str) -> genai.GenerativeModel:
+    """
+    Get the process-wide Gemini model client.
+    
+    ``genai.configure`` replaces the SDK's global transport clients, so it
+    is called once per API key. Every service instance then shares the same
+    underlying connection and credentials instead of rebuilding them.
+    
+    Args:
+        api_key: Google API key
+        model_name: Gemini model name
+        
+    Returns:
+        genai.GenerativeModel: Shared model client
+    """
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
+
+async def warm_up_gemini(settings: Settings) -> None:
+    """
+    Create the shared Gemini client and send it one short request.
+    
+    Run at application startup so the first user request doesn't pay for
+    connection setup and credential exchange. Failures are logged and
+    otherwise ignored; requests will simply pay the cold start instead.
+    
+    Args:
+        settings: Application configuration
+    """
+    if not settings.google_api_key or settings.google_api_key == "your_google_api_key_here":
+        return
+    
+    try:
+        model = get_gemini_model(settings.google_api_key, settings.gemini_model)
+        await asyncio.wait_for(
+            model.generate_content_async(
+                "ping",
+                generation_config=genai.GenerationConfig(max_output_tokens=1)
+            ),
+            timeout=HEALTH_CHECK_TIMEOUT
+        )
+        logger.info("Gemini client warmed up for model: %s", settings.gemini_model)
+        
+    except Exception as e:
+        logger.warning("Gemini warm-up failed: %s", e)
 
 
 class AIService:
@@ -31,6 +218,24 @@ class AIService:
         """
         self.settings = settings
         self.client = None
+        self._response_cache = diskcache.Cache(settings.llm_cache_dir)
+        # Explicit context caches per filing; our handle expires before
+        # Gemini's cache does, so a cached model is never used past its TTL
+        ttl = settings.gemini_cache_ttl
+        self._context_caches = _ContextCaches(
+            maxsize=settings.gemini_cache_size,
+            ttl=max(ttl - 60, ttl / 2)
+        )
+        # One creation per filing at a time, so concurrent first requests
+        # share a single context cache
+        self._context_cache_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+            weakref.WeakValueDictionary()
+        )
+        # Bounds concurrent Gemini generations to stay within rate limits
+        self._generation_slots = asyncio.Semaphore(settings.gemini_concurrency)
+        # Memoized health probe result as (expires_at, status)
+        self._health_lock = asyncio.Lock()
+        self._health_result: Optional[Tuple[float, Dict[str, Any]]] = None
         self._initialize_client()
     
     def _initialize_client(self):
@@ -42,75 +247,235 @@ class AIService:
         """
         try:
             if not self.settings.google_api_key or self.settings.google_api_key == "your_google_api_key_here":
-                logging.warning("Google API key not configured - AI features will be limited")
+                logger.warning("Google API key not configured - AI features will be limited")
                 self.client = None
                 return
             
-            # Configure the client
-            genai.configure(api_key=self.settings.google_api_key)
-            self.client = genai.GenerativeModel(self.settings.gemini_model)
+            # Reuse the process-wide client and its connections
+            self.client = get_gemini_model(self.settings.google_api_key, self.settings.gemini_model)
             
-            logging.info(f"AI service initialized with model: {self.settings.gemini_model}")
+            logger.info("AI service initialized with model: %s", self.settings.gemini_model)
             
         except Exception as e:
-            logging.error(f"Failed to initialize Google Gemini client: {str(e)}")
+            logger.error("Failed to initialize Google Gemini client: %s", e)
             self.client = None
     
     async def analyze_with_context(
         self,
-        question: str,
+        question: Union[str, List[str]],
         context_documents: List[Document],
         filing_metadata: Dict[str, Any],
-        max_response_length: Optional[int] = None
-    ) -> Dict[str, Any]:
+        max_response_length: Optional[int] = None,
+        filing_documents: Optional[List[Document]] = None,
+        history: str = ""
+    ) -> Union[AIResult, List[AIResult]]:
         """
         Analyze question with document context using Gemini.
         
+        Canonical metric questions (revenue, net income, EPS, cash) whose
+        value appears in the top chunk are answered by extraction when the
+        fast path is enabled. A list of questions is answered with a single
+        batched Gemini call.
+        
         Args:
-            question: User's question about the filing
+            question: User's question about the filing, or a list of questions
             context_documents: Relevant document chunks
             filing_metadata: Metadata about the filing
             max_response_length: Maximum response length
+            filing_documents: All chunks of the filing, used to populate
+                Gemini's explicit context cache for long filings
+            history: Rendered earlier turns of the analysis session; answers
+                that depend on history never take the fast path
             
         Returns:
-            Dictionary with analysis results
+            AIResult with the analysis, or a list of them (one per question,
+            in order) when a list of questions is given
             
         Raises:
             AIServiceError: If analysis fails
         """
+        if not isinstance(question, str):
+            return await self.analyze_questions_with_context(
+                questions=question,
+                context_documents=context_documents,
+                filing_metadata=filing_metadata,
+                max_response_length=max_response_length,
+                filing_documents=filing_documents
+            )
+        
         try:
+            if self.settings.enable_fast_path and not history:
+                fast_answer = extract_answer(question, context_documents)
+                if fast_answer is not None:
+                    logger.info("Answering question with extractive fast path")
+                    return self._parse_response(fast_answer.answer, context_documents[:1])._replace(
+                        confidence_score=fast_answer.confidence_score,
+                        model="extractive-fast-path",
+                        provider="Pattern extraction"
+                    )
+            
             if not self.client:
-                return {
-                    "answer": "AI service is not available. Please configure your Google API key in the .env file.",
-                    "confidence_score": 0.0,
-                    "context_used": [],
-                    "model_info": {
-                        "model": "unavailable",
-                        "provider": "Google Gemini (not configured)"
-                    }
-                }
+                return self._unavailable_result()
             
-            # Prepare context from documents
-            context = self._prepare_context(context_documents, filing_metadata)
+            # Reuse the filing's cached context when available, otherwise
+            # prepare context from the retrieved documents
+            model, context = await self._model_and_context(
+                context_documents, filing_metadata, filing_documents, history
+            )
             
             # Create prompt
-            prompt = self._create_analysis_prompt(question, context, max_response_length)
+            prompt = self._create_analysis_prompt(question, context, max_response_length, history)
             
             # Generate response
-            response = await self._generate_response(prompt)
+            response = await self._generate_response(prompt, model=model)
             
             # Parse and structure response
-            result = self._parse_response(response, context_documents)
-            
-            return result
+            return self._parse_response(response, context_documents)
             
         except Exception as e:
             raise AIServiceError(f"Failed to analyze with context: {str(e)}")
     
+    async def analyze_questions_with_context(
+        self,
+        questions: List[str],
+        context_documents: List[Document],
+        filing_metadata: Dict[str, Any],
+        max_response_length: Optional[int] = None,
+        filing_documents: Optional[List[Document]] = None
+    ) -> List[AIResult]:
+        """
+        Answer several questions about one filing with a single Gemini call.
+        
+        The shared context is sent once and Gemini returns a JSON list of
+        answers. If the reply cannot be parsed, each question is answered
+        with its own call.
+        
+        Args:
+            questions: User questions about the filing
+            context_documents: Relevant document chunks for all questions
+            filing_metadata: Metadata about the filing
+            max_response_length: Maximum response length per answer
+            filing_documents: All chunks of the filing, used for context caching
+            
+        Returns:
+            List of AIResult objects, one per question in order
+            
+        Raises:
+            AIServiceError: If analysis fails
+        """
+        try:
+            if not self.client:
+                return [self._unavailable_result() for _ in questions]
+            
+            model, context = await self._model_and_context(
+                context_documents, filing_metadata, filing_documents
+            )
+            prompt = self._create_batch_analysis_prompt(questions, context, max_response_length)
+            response = await self._generate_response(prompt, model=model, json_output=True)
+            
+            answers = self._split_batch_response(response, len(questions))
+            if answers is None:
+                logger.warning("Could not parse batched Gemini response, answering questions individually")
+                return list(await asyncio.gather(*(
+                    self.analyze_with_context(
+                        question=question,
+                        context_documents=context_documents,
+                        filing_metadata=filing_metadata,
+                        max_response_length=max_response_length,
+                        filing_documents=filing_documents
+                    )
+                    for question in questions
+                )))
+            
+            return [self._parse_response(answer, context_documents) for answer in answers]
+            
+        except AIServiceError:
+            raise
+        except Exception as e:
+            raise AIServiceError(f"Failed to analyze questions with context: {str(e)}")
+    
+    async def stream_with_context(
+        self,
+        question: str,
+        context_documents: List[Document],
+        filing_metadata: Dict[str, Any],
+        max_response_length: Optional[int] = None,
+        filing_documents: Optional[List[Document]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream the answer to a question as Gemini generates it.
+        
+        Args:
+            question: User's question about the filing
+            context_documents: Relevant document chunks
+            filing_metadata: Metadata about the filing
+            max_response_length: Maximum response length
+            filing_documents: All chunks of the filing, used for context caching
+            
+        Yields:
+            Answer text fragments in generation order
+            
+        Raises:
+            AIServiceError: If generation fails
+        """
+        if not self.client:
+            yield self._unavailable_result().answer
+            return
+        
+        try:
+            model, context = await self._model_and_context(
+                context_documents, filing_metadata, filing_documents
+            )
+            prompt = self._create_analysis_prompt(question, context, max_response_length)
+            
+            async with self._generation_slots:
+                response = await (model or self.client).generate_content_async(
+                    prompt,
+                    generation_config=self._generation_config(),
+                    stream=True
+                )
+                
+                async for chunk in response:
+                    if chunk.text:
+                        yield chunk.text
+                    
+        except Exception as e:
+            raise AIServiceError(f"Failed to stream response: {str(e)}")
+    
+    def finalize_streamed_answer(
+        self,
+        answer: str,
+        context_documents: List[Document]
+    ) -> AIResult:
+        """
+        Build the analysis result for a fully streamed answer.
+        
+        Args:
+            answer: Concatenated streamed answer
+            context_documents: Context documents used
+            
+        Returns:
+            AIResult: Structured analysis result
+        """
+        if not self.client:
+            return self._unavailable_result()
+        return self._parse_response(answer.strip(), context_documents)
+    
+    def _unavailable_result(self) -> AIResult:
+        """Build the result returned when Gemini is not configured."""
+        return AIResult(
+            answer="AI service is not available. Please configure your Google API key in the .env file.",
+            confidence_score=0.0,
+            context_used=(),
+            model=UNAVAILABLE_MODEL,
+            provider="Google Gemini (not configured)"
+        )
+    
     def _prepare_context(
         self, 
         documents: List[Document], 
-        metadata: Dict[str, Any]
+        metadata: Dict[str, Any],
+        history: str = ""
     ) -> str:
         """
         Prepare context string from relevant documents.
@@ -118,35 +483,49 @@ class AIService:
         Args:
             documents: List of relevant document chunks
             metadata: Filing metadata
+            history: Rendered session history sent in the same prompt, which
+                counts against the input token budget
             
         Returns:
             Formatted context string
         """
-        context_parts = []
-        
-        # Add filing metadata
+        # Filing metadata header, formatted once per filing
+        header = ""
         if metadata:
-            context_parts.append("FILING INFORMATION:")
-            for key, value in metadata.items():
-                if value and key in ['company_name', 'form_type', 'filing_date', 'source_url']:
-                    context_parts.append(f"- {key.replace('_', ' ').title()}: {value}")
-            context_parts.append("")
-        
-        # Add document chunks
-        context_parts.append("RELEVANT EXCERPTS:")
-        for i, doc in enumerate(documents[:10], 1):  # Limit to top 10 chunks
-            chunk_text = doc.page_content.strip()
-            if len(chunk_text) > 50:  # Skip very short chunks
-                context_parts.append(f"\nExcerpt {i}:")
-                context_parts.append(chunk_text)
-        
-        return "\n".join(context_parts)
+            header = _format_filing_header(tuple(
+                (key, value) for key, value in metadata.items()
+                if value and key in _FILING_HEADER_KEYS
+            ))
+        
+        # Pack chunks in rank order while they fit the input token budget;
+        # a chunk too large for the remaining budget is skipped so smaller,
+        # lower-ranked chunks can still use it. Chunks arrive stripped and
+        # with very short ones already dropped by the document processor.
+        budget = (
+            self.settings.max_input_tokens
+            - PROMPT_OVERHEAD_TOKENS
+            - estimate_tokens(header)
+            - estimate_tokens(history)
+        )
+        excerpts = []
+        for i, doc in enumerate(documents, 1):
+            chunk_text = doc.page_content
+            
+            # Token counts are stored on the chunk when the filing is split
+            n_tokens = int(doc.metadata.get("n_tokens") or estimate_tokens(chunk_text))
+            if n_tokens > budget:
+                continue
+            budget -= n_tokens
+            excerpts.append(f"\n\nExcerpt {i}:\n{chunk_text}")
+        
+        return f"{header}RELEVANT EXCERPTS:{''.join(excerpts)}"
     
     def _create_analysis_prompt(
         self,
         question: str,
         context: str,
-        max_response_length: Optional[int] = None
+        max_response_length: Optional[int] = None,
+        history: str = ""
     ) -> str:
         """
         Create optimized prompt for SEC filing analysis.
@@ -155,6 +534,7 @@ class AIService:
             question: User's question
             context: Prepared context
             max_response_length: Maximum response length
+            history: Rendered earlier turns of the analysis session
             
         Returns:
             Formatted prompt
@@ -163,38 +543,221 @@ class AIService:
         if max_response_length:
             length_instruction = f"Keep your response under {max_response_length} characters. "
         
-        prompt = f"""You are an expert financial analyst specializing in SEC filings. You help investors and analysts understand complex financial documents by providing accurate, detailed, and insightful analysis.
-
-CONTEXT:
-{context}
+        history_block = f"CONVERSATION HISTORY:\n{history}\n" if history else ""
+        
+        return ANALYSIS_PROMPT_PREFIX + context + ANALYSIS_PROMPT_SUFFIX.format(
+            history=history_block,
+            question=question,
+            length_instruction=length_instruction
+        )
+    
+    def _create_batch_analysis_prompt(
+        self,
+        questions: List[str],
+        context: str,
+        max_response_length: Optional[int] = None
+    ) -> str:
+        """
+        Create a prompt that answers several questions in one response.
+        
+        Args:
+            questions: User questions
+            context: Prepared context
+            max_response_length: Maximum length of each answer
+            
+        Returns:
+            Formatted prompt
+        """
+        length_instruction = ""
+        if max_response_length:
+            length_instruction = f"Keep each answer under {max_response_length} characters. "
+        
+        numbered_questions = "\n".join(
+            f"{index}. {question}" for index, question in enumerate(questions, 1)
+        )
+        
+        prompt = ANALYSIS_PROMPT_PREFIX + context + f"""
 
-QUESTION: {question}
+QUESTIONS:
+{numbered_questions}
 
 INSTRUCTIONS:
 1. Analyze the provided SEC filing excerpts carefully
-2. Answer the question based ONLY on the information provided in the context
+2. Answer each question based ONLY on the information provided in the context
 3. If the information isn't available in the context, clearly state that
 4. Provide specific details, numbers, and quotes when available
-5. Be precise and professional in your response
-6. {length_instruction}Structure your response clearly with relevant headings if needed
+5. Be precise and professional in your responses
+6. {length_instruction}Answer every question independently and completely
 
-IMPORTANT GUIDELINES:
-- Only use information from the provided context
-- Quote specific excerpts when making claims
-- If asking about financial numbers, provide exact figures when available
-- Explain financial terminology when necessary
-- Highlight any limitations in the available data
+Return ONLY a JSON object of the form:
+{{"answers": [{{"index": 1, "answer": "..."}}, {{"index": 2, "answer": "..."}}]}}
 
 RESPONSE:"""
         
         return prompt
     
-    async def _generate_response(self, prompt: str) -> str:
+    def _split_batch_response(self, response_text: str, expected: int) -> Optional[List[str]]:
+        """
+        Extract per-question answers from a batched Gemini response.
+        
+        Args:
+            response_text: Raw response from Gemini
+            expected: Number of questions asked
+            
+        Returns:
+            Answers ordered by question index, or None if the response is malformed
+        """
+        text = response_text.strip()
+        if text.startswith("```"):
+            # Strip a markdown code fence around the JSON payload
+            text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+        
+        try:
+            payload = json.loads(text)
+            answers = {int(item["index"]): str(item["answer"]).strip() for item in payload["answers"]}
+        except (ValueError, KeyError, TypeError):
+            return None
+        
+        if sorted(answers) != list(range(1, expected + 1)):
+            return None
+        return [answers[index] for index in range(1, expected + 1)]
+    
+    def _response_cache_key(self, prompt: str, model_name: str, json_output: bool = False) -> str:
+        """Build the response cache key for a prompt and its generation settings."""
+        key_material = json.dumps(
+            {
+                "model": model_name,
+                "max_output_tokens": self.settings.max_response_length or 4000,
+                "json_output": json_output,
+                "prompt": prompt
+            },
+            sort_keys=True
+        )
+        return hashlib.sha256(key_material.encode()).hexdigest()
+    
+    def _generation_config(self, json_output: bool = False) -> genai.GenerationConfig:
+        """Build the generation settings used for analysis requests."""
+        return genai.GenerationConfig(
+            temperature=0.1,  # Low temperature for factual responses
+            top_p=0.8,
+            top_k=40,
+            max_output_tokens=self.settings.max_response_length or 4000,
+            response_mime_type="application/json" if json_output else None,
+        )
+    
+    async def _model_and_context(
+        self,
+        context_documents: List[Document],
+        filing_metadata: Dict[str, Any],
+        filing_documents: Optional[List[Document]],
+        history: str = ""
+    ) -> Tuple[Optional[genai.GenerativeModel], str]:
+        """
+        Choose the model and prompt context for a question about a filing.
+        
+        A model bound to the filing's context cache already holds the full
+        filing, so its prompt only refers to it; otherwise the retrieved
+        excerpts are packed into the prompt.
+        
+        Args:
+            context_documents: Relevant document chunks
+            filing_metadata: Metadata about the filing
+            filing_documents: All chunks of the filing, used for context caching
+            history: Rendered session history sent in the same prompt
+            
+        Returns:
+            Tuple of the cached model (None to use the client) and the prompt context
+        """
+        model = await self._get_cached_model(filing_metadata.get("source_url"), filing_documents)
+        if model is not None:
+            return model, CACHED_FILING_CONTEXT
+        return None, self._prepare_context(context_documents, filing_metadata, history)
+    
+    async def _get_cached_model(
+        self,
+        filing_url: Optional[str],
+        filing_documents: Optional[List[Document]]
+    ) -> Optional[genai.GenerativeModel]:
+        """
+        Get a Gemini model bound to the filing's explicit context cache.
+        
+        The full filing text is uploaded once per filing URL and reused for
+        every question until the cache TTL expires. Short filings fall below
+        Gemini's minimum cache size and are sent uncached. The upload runs in
+        a worker thread, and concurrent requests for the same filing wait for
+        a single upload.
+        
+        Args:
+            filing_url: URL of the analyzed filing
+            filing_documents: All chunks of the filing
+            
+        Returns:
+            Model reading from the cached context, or None if caching is not used
+        """
+        if not filing_url or not filing_documents or self.settings.gemini_cache_ttl <= 0:
+            return None
+        
+        cache_key = hashlib.sha256(filing_url.encode("utf-8")).hexdigest()
+        entry = self._context_caches.get(cache_key)
+        if entry is not None:
+            return entry[1]
+        
+        filing_text = "\n\n".join(doc.page_content for doc in filing_documents)
+        if estimate_tokens(filing_text) < MIN_CACHE_TOKENS:
+            return None
+        
+        lock = self._context_cache_locks.get(cache_key)
+        if lock is None:
+            lock = self._context_cache_locks[cache_key] = asyncio.Lock()
+        
+        async with lock:
+            entry = self._context_caches.get(cache_key)
+            if entry is not None:
+                return entry[1]
+            
+            try:
+                cache = await asyncio.to_thread(
+                    caching.CachedContent.create,
+                    model=self.settings.gemini_model,
+                    display_name=f"sec-filing-{cache_key[:16]}",
+                    contents=[f"SEC FILING ({filing_url}):\n{filing_text}"],
+                    ttl=datetime.timedelta(seconds=self.settings.gemini_cache_ttl)
+                )
+                model = genai.GenerativeModel.from_cached_content(cached_content=cache)
+                
+            except Exception as e:
+                logger.warning("Failed to create Gemini context cache: %s", e)
+                return None
+            
+            self._context_caches[cache_key] = (cache, model)
+        
+        logger.info("Created Gemini context cache %s for %s", cache.name, filing_url)
+        
+        evicted = self._context_caches.take_evicted()
+        if evicted:
+            await asyncio.to_thread(_delete_context_caches, evicted)
+        
+        return model
+    
+    async def aclose(self) -> None:
+        """Delete the Gemini context caches created by this service."""
+        caches = self._context_caches.drain()
+        if caches:
+            await asyncio.to_thread(_delete_context_caches, caches)
+    
+    async def _generate_response(
+        self,
+        prompt: str,
+        model: Optional[genai.GenerativeModel] = None,
+        json_output: bool = False
+    ) -> str:
         """
         Generate response using Google Gemini.
         
         Args:
             prompt: Formatted prompt
+            model: Optional model bound to a cached context (defaults to the client)
+            json_output: Whether to request a JSON response
             
         Returns:
             Generated response text
@@ -206,21 +769,30 @@ RESPONSE:"""
             if not self.client:
                 raise AIServiceError("Google Gemini client not initialized")
             
-            # Generate content using Gemini
-            response = self.client.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.1,  # Low temperature for factual responses
-                    top_p=0.8,
-                    top_k=40,
-                    max_output_tokens=self.settings.max_response_length or 4000,
+            model = model or self.client
+            
+            # Identical prompts are answered from the persistent response cache;
+            # diskcache does blocking SQLite I/O, so keep it off the event loop
+            cache_key = self._response_cache_key(prompt, model.model_name, json_output)
+            cached_text = await asyncio.to_thread(self._response_cache.get, cache_key)
+            if cached_text is not None:
+                return cached_text
+            
+            # Generate content using Gemini without blocking the event loop
+            async with self._generation_slots:
+                response = await model.generate_content_async(
+                    prompt,
+                    generation_config=self._generation_config(json_output)
                 )
-            )
             
             if not response.text:
                 raise AIServiceError("Empty response from Gemini API")
             
-            return response.text.strip()
+            text = response.text.strip()
+            await asyncio.to_thread(
+                self._response_cache.set, cache_key, text, expire=self.settings.llm_cache_ttl
+            )
+            return text
             
         except Exception as e:
             raise AIServiceError(f"Failed to generate response: {str(e)}")
@@ -229,7 +801,7 @@ RESPONSE:"""
         self, 
         response_text: str, 
         context_docs: List[Document]
-    ) -> Dict[str, Any]:
+    ) -> AIResult:
         """
         Parse and structure the AI response.
         
@@ -238,29 +810,28 @@ RESPONSE:"""
             context_docs: Context documents used
             
         Returns:
-            Structured response dictionary
+            AIResult: Structured analysis result
         """
         # Calculate confidence score based on response characteristics
         confidence_score = self._calculate_confidence_score(response_text, context_docs)
         
-        # Extract context information
-        context_info = []
-        for doc in context_docs[:5]:  # Top 5 for response
-            context_info.append({
+        # Extract context information, top 5 for response
+        context_info = tuple(
+            {
                 "chunk_id": doc.metadata.get("chunk_id", 0),
                 "source": doc.metadata.get("source_url", ""),
-                "relevance": "high"  # Could be enhanced with scoring
-            })
-        
-        return {
-            "answer": response_text,
-            "confidence_score": confidence_score,
-            "context_used": context_info,
-            "model_info": {
-                "model": self.settings.gemini_model,
-                "provider": "Google Gemini"
+                "relevance": doc.metadata.get("similarity_score")  # None for fallback chunks
             }
-        }
+            for doc in context_docs[:5]
+        )
+        
+        return AIResult(
+            answer=response_text,
+            confidence_score=confidence_score,
+            context_used=context_info,
+            model=self.settings.gemini_model,
+            provider="Google Gemini"
+        )
     
     def _calculate_confidence_score(
         self, 
@@ -281,17 +852,11 @@ RESPONSE:"""
             score = 0.5  # Base score
             
             # Check if response indicates uncertainty
-            uncertainty_phrases = [
-                "not available", "not provided", "unclear", "cannot determine",
-                "insufficient information", "not specified", "unknown"
-            ]
-            
-            if any(phrase in response.lower() for phrase in uncertainty_phrases):
+            if _UNCERTAINTY_RE.search(response):
                 score -= 0.2
             
             # Check for specific data/numbers (indicates concrete information)
-            import re
-            if re.search(r'\$[\d,]+|\d+%|\d{4}-\d{2}-\d{2}', response):
+            if _CONCRETE_DATA_RE.search(response):
                 score += 0.2
             
             # Check context availability
@@ -316,6 +881,25 @@ RESPONSE:"""
         """
         Perform health check on AI service.
         
+        The result is reused for HEALTH_CHECK_TTL seconds and concurrent
+        callers share a single probe, so frequent polling doesn't keep
+        calling the Gemini API.
+        
+        Returns:
+            Health status dictionary
+        """
+        async with self._health_lock:
+            if self._health_result and self._health_result[0] > time.monotonic():
+                return dict(self._health_result[1])
+            
+            status = await self._probe_health()
+            self._health_result = (time.monotonic() + HEALTH_CHECK_TTL, status)
+            return dict(status)
+    
+    async def _probe_health(self) -> Dict[str, Any]:
+        """
+        Send a test prompt to Gemini and classify the outcome.
+        
         Returns:
             Health status dictionary
         """
@@ -330,7 +914,10 @@ RESPONSE:"""
             
             # Test with simple prompt
             test_prompt = "Respond with 'OK' if you can process this request."
-            response = self.client.generate_content(test_prompt)
+            response = await asyncio.wait_for(
+                self.client.generate_content_async(test_prompt),
+                timeout=HEALTH_CHECK_TIMEOUT
+            )
             
             if response.text and "OK" in response.text:
                 return {
@@ -346,6 +933,14 @@ RESPONSE:"""
                     "issue": "Unexpected response format"
                 }
                 
+        except asyncio.TimeoutError:
+            return {
+                "status": "unhealthy",
+                "model": self.settings.gemini_model,
+                "provider": "Google Gemini",
+                "error": f"No response within {HEALTH_CHECK_TIMEOUT} seconds"
+            }
+            
         except Exception as e:
             return {
                 "status": "unhealthy",
@@ -6,15 +6,31 @@ document processing, vector embedding, and AI-powered question answering.
 """
 
 import time
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+from itertools import zip_longest
+from typing import Optional, List, Dict, Any, AsyncIterator
+import httpx
+from cachetools import TTLCache
+import numpy as np
 from app.core.config import Settings
-from app.models.schemas import AnalysisResponse, FilingType
+from app.models.schemas import AIModelInfo, AnalysisResponse, DocumentChunk, FilingInfo, FilingType
 from app.services.document_processor import DocumentProcessor
 from app.services.vector_manager import VectorManager
-from app.services.ai_service import AIService
+from app.services.ai_service import AIResult, AIService
+from app.services.conversation import ConversationState
+from app.services.semantic_cache import get_semantic_cache
 from app.utils.exceptions import DocumentProcessingError, AIServiceError
 
+logger = logging.getLogger(__name__)
+
+
+# Filing-level metadata keys copied from the first chunk of a filing
+_WANTED_KEYS = frozenset({"company_name", "form_type", "filing_date"})
+
+# Maximum chunks in the shared context of a batched prompt
+MAX_BATCH_CONTEXT_CHUNKS = 10
+
 
 class AnalyzerService:
     """
@@ -27,25 +43,47 @@ class AnalyzerService:
     4. AI-powered question answering with context
     """
     
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, http_client: Optional[httpx.AsyncClient] = None):
         """
         Initialize analyzer service with all required components.
         
         Args:
             settings: Application configuration settings
+            http_client: Shared HTTP client for fetching SEC filings
         """
         self.settings = settings
         self._temp_files: List[str] = []
         
         # Initialize component services
-        self.doc_processor = DocumentProcessor(settings)
+        self.doc_processor = DocumentProcessor(settings, http_client=http_client)
         self.vector_manager = VectorManager(settings)
         self.ai_service = AIService(settings)
         
-        # Track initialization status
+        # Track initialization status; the lock keeps concurrent requests
+        # from loading the embedding model twice
         self._vector_initialized = False
+        self._vector_init_lock = asyncio.Lock()
+        
+        # Chunks of recently indexed filings, so follow-up questions skip
+        # fetching and re-embedding the same filing
+        self._ingested_filings: TTLCache = TTLCache(
+            maxsize=settings.filing_cache_size,
+            ttl=settings.filing_cache_ttl
+        )
+        
+        # Filing-level metadata extracted from the chunks, keyed by filing URL
+        self._filing_metadata: TTLCache = TTLCache(
+            maxsize=settings.filing_cache_size,
+            ttl=settings.filing_cache_ttl
+        )
+        
+        # Sliding-window history of multi-turn analysis sessions
+        self._conversations: TTLCache = TTLCache(
+            maxsize=settings.session_cache_size,
+            ttl=settings.session_ttl
+        )
         
-        logging.info("Analyzer service initialized with all AI components")
+        logger.info("Analyzer service initialized with all AI components")
     
     async def analyze_filing(
         self,
@@ -53,7 +91,8 @@ class AnalyzerService:
         question: str,
         filing_type: Optional[FilingType] = None,
         include_context: bool = True,
-        max_response_length: Optional[int] = None
+        max_response_length: Optional[int] = None,
+        session_id: Optional[str] = None
     ) -> AnalysisResponse:
         """
         Perform complete SEC filing analysis using RAG pipeline.
@@ -64,101 +103,490 @@ class AnalyzerService:
             filing_type: Optional filing type specification
             include_context: Whether to include document context
             max_response_length: Maximum response length
+            session_id: Optional analysis session; earlier questions and
+                answers of the session are included in the prompt
             
         Returns:
             AnalysisResponse: Complete analysis results
         """
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
-            # Step 1: Process the document
-            logging.info(f"Processing SEC filing: {filing_url}")
-            documents = await self.doc_processor.fetch_and_process_filing(filing_url)
-            
-            if not documents:
-                raise DocumentProcessingError("No content could be extracted from the filing")
-            
-            # Step 2: Initialize vector database if needed
-            if not self._vector_initialized:
-                await self.vector_manager.initialize()
-                self._vector_initialized = True
+            # Steps 1-2: Fetch and chunk the filing
+            documents = await self._fetch_filing(filing_url)
             
-            # Step 3: Add documents to vector database
-            logging.info(f"Adding {len(documents)} document chunks to vector database")
-            doc_ids = await self.vector_manager.add_documents(documents)
+            # Step 3: Index the filing in a worker thread, overlapping the
+            # metadata extraction and question embedding
+            index_task = asyncio.create_task(self._index_filing(filing_url, documents))
+            filing_metadata = self._extract_filing_metadata(documents, filing_url)
+            question_embedding, _ = await asyncio.gather(
+                self.embed_question(question),
+                index_task
+            )
             
             # Step 4: Perform similarity search for relevant context
-            logging.info(f"Searching for relevant context for question: {question}")
-            relevant_docs = await self.vector_manager.similarity_search(
-                query=question,
-                top_k=8,  # Get top 8 most relevant chunks
-                filter_metadata=None
+            context_documents = await self._retrieve_context(
+                question, documents, filing_url, question_embedding
             )
             
-            # Extract documents and scores
-            context_documents = [doc for doc, score in relevant_docs if score > 0.3]  # Filter by relevance
-            
-            if not context_documents:
-                # If no relevant context found, use top documents anyway
-                context_documents = documents[:5]
-                logging.warning("No highly relevant context found, using top document chunks")
-            
-            # Step 5: Extract filing metadata
-            filing_metadata = self._extract_filing_metadata(documents, filing_url)
-            
-            # Step 6: Generate AI response with context
-            logging.info("Generating AI response with context")
+            # Step 5: Generate AI response with context and session history
+            conversation = self._get_conversation(session_id) if session_id else None
+            logger.info("Generating AI response with context")
             ai_result = await self.ai_service.analyze_with_context(
                 question=question,
                 context_documents=context_documents,
                 filing_metadata=filing_metadata,
-                max_response_length=max_response_length
+                max_response_length=max_response_length,
+                filing_documents=documents,
+                history=conversation.render() if conversation else ""
             )
             
-            # Step 7: Prepare comprehensive response
-            processing_time_ms = int((time.time() - start_time) * 1000)
+            if conversation is not None:
+                conversation.add_turn(question, ai_result.answer)
             
-            response = AnalysisResponse(
+            # Step 6: Prepare comprehensive response
+            response = self._build_response(
                 question=question,
-                answer=ai_result["answer"],
-                confidence_score=ai_result["confidence_score"],
-                filing_info={
-                    "url": filing_url,
-                    "type": filing_type.value if filing_type else "Unknown",
-                    "company_name": filing_metadata.get("company_name", "Unknown"),
-                    "form_type": filing_metadata.get("form_type", "Unknown"),
-                    "filing_date": filing_metadata.get("filing_date", "Unknown"),
-                    "chunks_processed": len(documents),
-                    "chunks_used_for_context": len(context_documents)
-                },
-                context_sources=ai_result.get("context_used", []) if include_context else [],
-                processing_time_ms=processing_time_ms,
-                ai_model_info={
-                    "llm": ai_result["model_info"]["model"],
-                    "embeddings": self.settings.hf_model_name,
-                    "vector_db": "ChromaDB"
-                }
+                ai_result=ai_result,
+                filing_url=filing_url,
+                filing_type=filing_type,
+                filing_metadata=filing_metadata,
+                documents=documents,
+                context_documents=context_documents,
+                include_context=include_context,
+                start_ns=start_ns
             )
             
-            logging.info(f"Analysis completed in {processing_time_ms}ms")
+            logger.info("Analysis completed in %dms", response.processing_time_ms)
             return response
             
         except DocumentProcessingError as e:
-            logging.error(f"Document processing failed: {str(e)}")
+            logger.error("Document processing failed: %s", e)
             raise
             
         except AIServiceError as e:
-            logging.error(f"AI service failed: {str(e)}")
+            logger.error("AI service failed: %s", e)
             raise
             
         except Exception as e:
-            logging.error(f"Unexpected error in analysis: {str(e)}")
+            logger.exception("Unexpected error in analysis")
             raise AIServiceError(f"Analysis pipeline failed: {str(e)}")
     
+    async def analyze_filing_batch(
+        self,
+        filing_url: str,
+        questions: List[str],
+        filing_type: Optional[FilingType] = None,
+        include_context: bool = True,
+        max_response_length: Optional[int] = None
+    ) -> List[AnalysisResponse]:
+        """
+        Answer several questions about one filing with a single Gemini call.
+        
+        The filing is fetched and indexed once, context is retrieved for
+        every question concurrently, and all questions are sent to Gemini in
+        one prompt. The shared context takes chunks from each question's
+        context in turn, so every question keeps its most relevant chunks
+        however many questions are batched.
+        
+        Args:
+            filing_url: URL to the SEC filing document
+            questions: Questions to ask about the filing
+            filing_type: Optional filing type specification
+            include_context: Whether to include document context
+            max_response_length: Maximum response length per answer
+            
+        Returns:
+            List of AnalysisResponse objects, one per question in order
+        """
+        start_ns = time.perf_counter_ns()
+        
+        try:
+            documents = await self._ingest_filing(filing_url)
+            
+            per_question_context = await asyncio.gather(*(
+                self._retrieve_context(question, documents, filing_url)
+                for question in questions
+            ))
+            context_documents = self._merge_batch_context(per_question_context)
+            
+            # Report, per question, only its chunks that made it into the prompt
+            included_chunks = {doc.page_content for doc in context_documents}
+            per_question_context = [
+                [doc for doc in question_context if doc.page_content in included_chunks]
+                for question_context in per_question_context
+            ]
+            
+            filing_metadata = self._extract_filing_metadata(documents, filing_url)
+            
+            logger.info("Generating batched AI response for %d questions", len(questions))
+            ai_results = await self.ai_service.analyze_with_context(
+                question=questions,
+                context_documents=context_documents,
+                filing_metadata=filing_metadata,
+                max_response_length=max_response_length,
+                filing_documents=documents
+            )
+            
+            return [
+                self._build_response(
+                    question=question,
+                    ai_result=ai_result,
+                    filing_url=filing_url,
+                    filing_type=filing_type,
+                    filing_metadata=filing_metadata,
+                    documents=documents,
+                    context_documents=question_context,
+                    include_context=include_context,
+                    start_ns=start_ns
+                )
+                for question, ai_result, question_context
+                in zip(questions, ai_results, per_question_context)
+            ]
+            
+        except DocumentProcessingError as e:
+            logger.error("Document processing failed: %s", e)
+            raise
+            
+        except AIServiceError as e:
+            logger.error("AI service failed: %s", e)
+            raise
+            
+        except Exception as e:
+            logger.exception("Unexpected error in batch analysis")
+            raise AIServiceError(f"Analysis pipeline failed: {str(e)}")
+    
+    @staticmethod
+    def _merge_batch_context(per_question_context: List[List]) -> List:
+        """
+        Merge per-question contexts into one bounded, deduplicated context.
+        
+        Chunks are taken round-robin by rank: every question's top chunk,
+        then every question's second chunk, and so on, until
+        MAX_BATCH_CONTEXT_CHUNKS chunks are selected.
+        
+        Args:
+            per_question_context: Relevant chunks of each question, best first
+            
+        Returns:
+            Merged list of document chunks
+        """
+        context_documents = []
+        seen_chunks = set()
+        for rank_group in zip_longest(*per_question_context):
+            for doc in rank_group:
+                if doc is None or doc.page_content in seen_chunks:
+                    continue
+                seen_chunks.add(doc.page_content)
+                context_documents.append(doc)
+                if len(context_documents) == MAX_BATCH_CONTEXT_CHUNKS:
+                    return context_documents
+        return context_documents
+    
+    async def stream_analyze_filing(
+        self,
+        filing_url: str,
+        question: str,
+        filing_type: Optional[FilingType] = None,
+        include_context: bool = True,
+        max_response_length: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the RAG pipeline and stream the answer as it is generated.
+        
+        Events are emitted in order: one "answer" event per generated text
+        fragment, then a single "complete" event carrying the full
+        AnalysisResponse.
+        
+        Args:
+            filing_url: URL to the SEC filing document
+            question: Question to ask about the filing
+            filing_type: Optional filing type specification
+            include_context: Whether to include document context
+            max_response_length: Maximum response length
+            
+        Yields:
+            Event dictionaries describing the progress of the analysis
+        """
+        start_ns = time.perf_counter_ns()
+        
+        try:
+            documents = await self._ingest_filing(filing_url)
+            context_documents = await self._retrieve_context(question, documents, filing_url)
+            filing_metadata = self._extract_filing_metadata(documents, filing_url)
+            
+            logger.info("Streaming AI response with context")
+            answer_parts = []
+            async for text in self.ai_service.stream_with_context(
+                question=question,
+                context_documents=context_documents,
+                filing_metadata=filing_metadata,
+                max_response_length=max_response_length,
+                filing_documents=documents
+            ):
+                answer_parts.append(text)
+                yield {"event": "answer", "text": text}
+            
+            ai_result = self.ai_service.finalize_streamed_answer(
+                "".join(answer_parts),
+                context_documents
+            )
+            response = self._build_response(
+                question=question,
+                ai_result=ai_result,
+                filing_url=filing_url,
+                filing_type=filing_type,
+                filing_metadata=filing_metadata,
+                documents=documents,
+                context_documents=context_documents,
+                include_context=include_context,
+                start_ns=start_ns
+            )
+            
+            logger.info("Streamed analysis completed in %dms", response.processing_time_ms)
+            yield {"event": "complete", "response": response.model_dump(mode="json")}
+            
+        except (DocumentProcessingError, AIServiceError) as e:
+            logger.error("Streaming analysis failed: %s", e)
+            raise
+            
+        except Exception as e:
+            logger.exception("Unexpected error in streaming analysis")
+            raise AIServiceError(f"Analysis pipeline failed: {str(e)}")
+    
+    async def _ingest_filing(self, filing_url: str) -> List:
+        """
+        Fetch, chunk and index a filing in the vector database.
+        
+        Args:
+            filing_url: URL to the SEC filing document
+            
+        Returns:
+            List of processed document chunks
+        """
+        documents = await self._fetch_filing(filing_url)
+        await self._index_filing(filing_url, documents)
+        return documents
+    
+    async def _fetch_filing(self, filing_url: str) -> List:
+        """
+        Fetch and chunk a filing, reusing the chunks of a recently indexed one.
+        
+        Every chunk is tagged with the requested filing URL so retrieval can
+        be restricted to this filing.
+        
+        Args:
+            filing_url: URL to the SEC filing document
+            
+        Returns:
+            List of processed document chunks
+            
+        Raises:
+            DocumentProcessingError: If no content could be extracted
+        """
+        documents = self._ingested_filings.get(filing_url)
+        if documents is not None:
+            logger.info("Reusing indexed SEC filing: %s", filing_url)
+            return documents
+        
+        logger.info("Processing SEC filing: %s", filing_url)
+        documents = await self.doc_processor.fetch_and_process_filing(filing_url)
+        
+        if not documents:
+            raise DocumentProcessingError("No content could be extracted from the filing")
+        
+        for doc in documents:
+            doc.metadata["filing_url"] = filing_url
+        
+        return documents
+    
+    async def _index_filing(self, filing_url: str, documents: List) -> None:
+        """
+        Add a filing's chunks to the vector database unless already indexed.
+        
+        Args:
+            filing_url: URL to the SEC filing document
+            documents: Processed document chunks
+        """
+        if filing_url in self._ingested_filings:
+            return
+        
+        # Initialize vector database if needed
+        await self._ensure_vector_initialized()
+        
+        # Add documents to vector database
+        logger.info("Adding %d document chunks to vector database", len(documents))
+        await self.vector_manager.add_documents(documents)
+        self._ingested_filings[filing_url] = documents
+    
+    async def _retrieve_context(
+        self,
+        question: str,
+        documents: List,
+        filing_url: str,
+        question_embedding: Optional[np.ndarray] = None
+    ) -> List:
+        """
+        Find the filing's document chunks most relevant to a question.
+        
+        The top 8 chunks are re-ranked with Maximal Marginal Relevance and
+        the 5 most relevant yet diverse ones are kept, so the prompt isn't
+        filled with near-duplicate neighbouring chunks.
+        
+        Args:
+            question: Question to find context for
+            documents: All chunks of the filing, used as a fallback
+            filing_url: URL of the filing to search within
+            question_embedding: Precomputed question embedding, if available
+            
+        Returns:
+            List of relevant document chunks
+        """
+        logger.info("Searching for relevant context for question: %s", question)
+        if question_embedding is None:
+            question_embedding = await self.embed_question(question)
+        
+        relevant_docs = await self.vector_manager.max_marginal_relevance_search(
+            query_embedding=question_embedding,
+            k=5,
+            fetch_k=8,  # Choose from the top 8 most relevant chunks
+            lambda_mult=0.5,
+            score_threshold=0.3,  # Filter by relevance
+            filter_metadata={"filing_url": filing_url}
+        )
+        
+        context_documents = [doc for doc, score in relevant_docs]
+        
+        if not context_documents:
+            # If no relevant context found, use top documents anyway
+            context_documents = documents[:5]
+            logger.warning("No highly relevant context found, using top document chunks")
+        
+        return context_documents
+    
+    def _build_response(
+        self,
+        question: str,
+        ai_result: AIResult,
+        filing_url: str,
+        filing_type: Optional[FilingType],
+        filing_metadata: Dict[str, Any],
+        documents: List,
+        context_documents: List,
+        include_context: bool,
+        start_ns: int
+    ) -> AnalysisResponse:
+        """
+        Assemble the API response for an analyzed question.
+        
+        Returns:
+            AnalysisResponse: Complete analysis results
+        """
+        processing_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+        
+        return AnalysisResponse(
+            question=question,
+            answer=ai_result.answer,
+            confidence_score=ai_result.confidence_score,
+            filing_info=FilingInfo(
+                url=filing_url,
+                type=filing_type.value if filing_type else "Unknown",
+                company_name=filing_metadata.get("company_name", "Unknown"),
+                form_type=filing_metadata.get("form_type", "Unknown"),
+                filing_date=filing_metadata.get("filing_date", "Unknown"),
+                chunks_processed=len(documents),
+                chunks_used_for_context=len(context_documents)
+            ),
+            relevant_chunks=self._relevant_chunks(context_documents) if include_context else [],
+            processing_time_ms=processing_time_ms,
+            ai_model_info=AIModelInfo(
+                llm=ai_result.model,
+                embeddings=self.settings.hf_model_name
+            )
+        )
+    
+    @staticmethod
+    def _relevant_chunks(context_documents: List) -> List[DocumentChunk]:
+        """
+        Describe the top context chunks, with their similarity scores, for the response.
+        
+        Args:
+            context_documents: Chunks used as context, most relevant first
+            
+        Returns:
+            List of DocumentChunk for the top 5 chunks; fallback chunks have no score
+        """
+        relevant_chunks = []
+        for doc in context_documents[:5]:
+            score = doc.metadata.get("similarity_score")
+            relevant_chunks.append(DocumentChunk(
+                content=doc.page_content,
+                chunk_id=str(doc.metadata.get("chunk_id", 0)),
+                # Inner products of normalized embeddings can be slightly negative
+                similarity_score=min(max(float(score), 0.0), 1.0) if score is not None else None,
+                metadata={
+                    key: value for key, value in doc.metadata.items()
+                    if key not in ("chunk_id", "similarity_score")
+                }
+            ))
+        return relevant_chunks
+    
+    def _get_conversation(self, session_id: str) -> ConversationState:
+        """
+        Get the conversation state of an analysis session, creating it if needed.
+        
+        Args:
+            session_id: Analysis session identifier
+            
+        Returns:
+            ConversationState: Sliding-window history of the session
+        """
+        conversation = self._conversations.get(session_id)
+        if conversation is None:
+            conversation = self._conversations[session_id] = ConversationState(
+                window_tokens=self.settings.history_window_tokens
+            )
+        return conversation
+    
+    async def embed_question(self, question: str) -> np.ndarray:
+        """
+        Embed a question with the shared embedding model.
+        
+        Args:
+            question: Question to embed
+            
+        Returns:
+            L2-normalized question embedding
+        """
+        await self._ensure_vector_initialized()
+        return await self.vector_manager.embed_query(question)
+    
+    async def initialize(self) -> None:
+        """
+        Load the embedding model and open the vector database.
+        
+        Called from the application lifespan so the first request doesn't
+        pay the model-load cost; later calls are no-ops.
+        """
+        await self._ensure_vector_initialized()
+    
+    async def _ensure_vector_initialized(self) -> None:
+        """Initialize the vector database and embedding model once."""
+        if self._vector_initialized:
+            return
+        
+        async with self._vector_init_lock:
+            if not self._vector_initialized:
+                await self.vector_manager.initialize()
+                self._vector_initialized = True
+    
     def _extract_filing_metadata(self, documents: List, filing_url: str) -> Dict[str, Any]:
         """
         Extract consolidated metadata from processed documents.
         
+        The result is memoized per filing URL, since every question about a
+        filing yields the same metadata.
+        
         Args:
             documents: List of processed documents
             filing_url: Original filing URL
@@ -166,16 +594,21 @@ class AnalyzerService:
         Returns:
             Consolidated metadata dictionary
         """
+        metadata = self._filing_metadata.get(filing_url)
+        if metadata is not None:
+            return metadata
+        
         metadata = {"source_url": filing_url}
         
         # Extract metadata from first document (which should have filing-level metadata)
         if documents and hasattr(documents[0], 'metadata'):
-            doc_metadata = documents[0].metadata
-            
-            for key in ['company_name', 'form_type', 'filing_date']:
-                if key in doc_metadata:
-                    metadata[key] = doc_metadata[key]
+            metadata = metadata | {
+                key: value
+                for key, value in documents[0].metadata.items()
+                if key in _WANTED_KEYS
+            }
         
+        self._filing_metadata[filing_url] = metadata
         return metadata
     
     async def get_system_status(self) -> Dict[str, Any]:
@@ -240,17 +673,25 @@ class AnalyzerService:
         Useful for testing or when starting fresh with new documents.
         """
         try:
-            if not self._vector_initialized:
-                await self.vector_manager.initialize()
-                self._vector_initialized = True
+            await self._ensure_vector_initialized()
             
             await self.vector_manager.clear_collection()
-            logging.info("Vector database cleared successfully")
+            self._ingested_filings.clear()
+            self._filing_metadata.clear()
+            # Cached answers were drawn from the cleared filings
+            get_semantic_cache().clear()
+            logger.info("Vector database cleared successfully")
             
         except Exception as e:
-            logging.error(f"Failed to clear vector database: {str(e)}")
+            logger.exception("Failed to clear vector database")
             raise AIServiceError(f"Failed to clear vector database: {str(e)}")
     
+    async def aclose(self) -> None:
+        """Release network and thread resources held by the component services."""
+        await self.doc_processor.aclose()
+        await self.ai_service.aclose()
+        await asyncio.to_thread(self.vector_manager.close)
+    
     def get_temp_files(self) -> List[str]:
         """
         Get list of temporary files for cleanup.
@@ -284,7 +725,7 @@ class AnalyzerService:
                 "sample_url": sample_url,
                 "sample_question": sample_question,
                 "processing_time_ms": result.processing_time_ms,
-                "chunks_processed": result.filing_info.get("chunks_processed", 0),
+                "chunks_processed": result.filing_info.chunks_processed,
                 "confidence_score": result.confidence_score
             }
             
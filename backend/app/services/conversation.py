@@ -0,0 +1,80 @@
+"""
+Conversation State for multi-turn SEC filing analysis.
+
+This module keeps a sliding window of recent questions and answers per
+analysis session so follow-up questions can refer back to earlier turns
+without the prompt growing with the length of the session.
+"""
+
+from collections import deque
+from typing import Deque, NamedTuple
+
+from app.utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+
+# Appended to a turn truncated to fit the window on its own
+TRUNCATION_MARKER = "...\n"
+
+
+class ConversationTurn(NamedTuple):
+    """One question and answer, with the token cost of its rendered text."""
+
+    question: str
+    answer: str
+    text: str
+    n_tokens: int
+
+
+class ConversationState:
+    """
+    Sliding window over the turns of one analysis session.
+
+    Each turn's rendered text and token count are computed once when it is
+    added, so trimming the oldest turns and rendering the history never
+    re-measure earlier turns.
+    """
+
+    def __init__(self, window_tokens: int = 2048):
+        """
+        Initialize conversation state.
+
+        Args:
+            window_tokens: Maximum estimated tokens of history to keep
+        """
+        self.window_tokens = window_tokens
+        self.total_tokens = 0
+        self._turns: Deque[ConversationTurn] = deque()
+
+    def add_turn(self, question: str, answer: str) -> None:
+        """
+        Record a turn and drop the oldest turns that no longer fit the window.
+
+        The newest turn is always kept; if it alone exceeds the window, its
+        rendered text is truncated to fit.
+
+        Args:
+            question: Question asked
+            answer: Answer given
+        """
+        text = f"Q: {question}\nA: {answer}\n"
+        if estimate_tokens(text) > self.window_tokens:
+            max_chars = max(self.window_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER), 0)
+            text = text[:max_chars] + TRUNCATION_MARKER
+        turn = ConversationTurn(question, answer, text, estimate_tokens(text))
+        self._turns.append(turn)
+        self.total_tokens += turn.n_tokens
+
+        while self.total_tokens > self.window_tokens and len(self._turns) > 1:
+            self.total_tokens -= self._turns.popleft().n_tokens
+
+    def render(self) -> str:
+        """
+        Render the retained history for inclusion in a prompt.
+
+        Returns:
+            History text, oldest turn first, or an empty string if there is none
+        """
+        return "\n".join(turn.text for turn in self._turns)
+
+    def __len__(self) -> int:
+        return len(self._turns)
@@ -5,19 +5,122 @@ This service handles fetching, parsing, and chunking SEC filings
 for AI analysis and vector embedding generation.
 """
 
+import os
 import re
+import asyncio
+import logging
 import tempfile
+import threading
 import aiofiles
-from typing import List, Dict, Optional, Tuple
+import diskcache
+from typing import Awaitable, Callable, List, Dict, Optional, Tuple
 from urllib.parse import urlparse
 import httpx
-from bs4 import BeautifulSoup
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from lxml import etree, html
+from semantic_text_splitter import TextSplitter
 from langchain_core.documents import Document
 
 from app.utils.exceptions import DocumentProcessingError
+from app.utils.tokens import estimate_tokens
 from app.core.config import Settings
 
+logger = logging.getLogger(__name__)
+
+# Request headers sent with every SEC fetch; SEC asks automated clients to
+# identify themselves with a contact address
+DEFAULT_HEADERS = {
+    "User-Agent": "AI SEC Filing Analyzer v1.0 Educational Research Tool - Contact: developer@example.com",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+    "From": "developer@example.com"
+}
+
+# Parsers for filings fetched as text, one per worker thread: lxml locks a
+# parser while it is in use, so a shared one would serialize the workers
+_PARSERS = threading.local()
+
+
+def _html_parser() -> html.HTMLParser:
+    """
+    Get the calling thread's HTML parser.
+    
+    Content is re-encoded as UTF-8 before parsing, so documents with an XML
+    encoding declaration parse too.
+    """
+    parser = getattr(_PARSERS, "html", None)
+    if parser is None:
+        parser = _PARSERS.html = html.HTMLParser(encoding="utf-8", remove_comments=True)
+    return parser
+
+# Text normalization used by _clean_text. Control characters that are
+# whitespace are left to _WS_RE, which turns them into spaces.
+_CTRL_TRANSLATE = dict.fromkeys(
+    code for code in (*range(0x00, 0x20), *range(0x7f, 0xa0))
+    if not chr(code).isspace()
+)
+_WS_RE = re.compile(r"\s+")
+_REPEAT_PUNCT_RE = re.compile(r"([.!?])\1+")
+
+_SEC_DOMAINS = frozenset({"sec.gov", "www.sec.gov"})
+
+# Header lines of plain-text SEC submissions, mapped to metadata keys
+_TEXT_HEADER_RE = re.compile(
+    r"^[ \t]*(COMPANY CONFORMED NAME|FORM TYPE|FILED AS OF DATE|PERIOD OF REPORT):(.*)$",
+    re.M
+)
+_TEXT_HEADER_KEYS = {
+    "COMPANY CONFORMED NAME": "company_name",
+    "FORM TYPE": "form_type",
+    "FILED AS OF DATE": "filing_date",
+    "PERIOD OF REPORT": "period_end_date"
+}
+_TEXT_HEADER_CHARS = 8192
+
+# Document path of an XBRL viewer URL, without query parameters
+_XBRL_VIEWER_RE = re.compile(r"/ix\?doc=([^?]+)")
+_HTML_EXTENSION_RE = re.compile(r"\.html?$")
+
+# SEC header fields, matched in one pass over the filing text. Values stop
+# at a line break or tag so the pattern also works on raw markup.
+_METADATA_RE = re.compile(
+    r"COMPANY\s+CONFORMED\s+NAME:[ \t]*(?P<company_name>[^<\r\n]+)"
+    r"|FORM\s+TYPE:[ \t]*(?P<form_type>[^<\r\n]+)"
+    r"|FILED\s+AS\s+OF\s+DATE:[ \t]*(?P<filing_date>[^<\r\n]+)",
+    re.I
+)
+_METADATA_KEYS = frozenset(_METADATA_RE.groupindex)
+
+# SEC submission headers sit in plain text at the top of a filing
+_HEADER_SCAN_CHARS = 65536
+
+
+def create_http_client(settings: Settings) -> httpx.AsyncClient:
+    """
+    Create a pooled HTTP client for fetching SEC filings.
+    
+    Keep-alive connections let consecutive fetches from sec.gov skip the
+    TCP and TLS handshakes, and HTTP/2 multiplexes concurrent fetches over
+    a single connection.
+    
+    Args:
+        settings: Application configuration
+        
+    Returns:
+        httpx.AsyncClient: Client with connection pooling enabled
+    """
+    return httpx.AsyncClient(
+        timeout=settings.request_timeout,
+        follow_redirects=True,
+        http2=True,
+        headers=DEFAULT_HEADERS,
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=75
+        )
+    )
+
 
 class DocumentProcessor:
     """
@@ -27,18 +130,27 @@ class DocumentProcessor:
     for optimal AI analysis and vector embedding generation.
     """
     
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, http_client: Optional[httpx.AsyncClient] = None):
         """
         Initialize document processor.
         
         Args:
             settings: Application configuration
+            http_client: Shared HTTP client; one is created lazily if omitted
         """
         self.settings = settings
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.chunk_size,
-            chunk_overlap=settings.chunk_overlap,
-            separators=["\n\n", "\n", ".", "!", "?", ";", " ", ""]
+        self._http_client = http_client
+        self._owns_http_client = http_client is None
+        
+        # Raw filings keyed by URL with their HTTP validators, so repeat
+        # fetches are conditional GETs answered with 304 Not Modified
+        self._filing_cache = diskcache.Cache(settings.filing_http_cache_dir)
+        
+        # Compiled recursive splitter: falls back from paragraphs to lines,
+        # sentences, words and characters, like LangChain's separator cascade
+        self.text_splitter = TextSplitter(
+            capacity=settings.chunk_size,
+            overlap=settings.chunk_overlap
         )
         
     async def fetch_and_process_filing(self, filing_url: str) -> List[Document]:
@@ -73,105 +185,189 @@ class DocumentProcessor:
         """
         Try multiple SEC filing formats for best content extraction.
         
+        Formats are tried in priority order (HTML, text, original), skipping
+        any that resolve to an already tried URL. The next format is started
+        once the current one fails or returns little content, or as a hedge
+        when it has not finished within FORMAT_HEDGE_DELAY seconds. The
+        highest-priority format with substantial content wins; otherwise the
+        format with the most content is used.
+        
         Args:
             base_url: Original filing URL
             
         Returns:
             List of document chunks from best available format
         """
-        strategies = [
-            ("HTML Direct", self._try_html_format),
-            ("Text Format", self._try_text_format), 
-            ("Original Format", self._try_original_format)
-        ]
+        candidates = self._format_candidates(base_url)
+        attempts: List[asyncio.Future] = []
+        results: Dict[int, Tuple[str, List[Document], int]] = {}
         
-        best_chunks = []
-        best_content_length = 0
+        def start_next() -> None:
+            strategy_name, strategy_func, url = candidates[len(attempts)]
+            attempts.append(asyncio.ensure_future(self._safe_try(strategy_name, strategy_func, url)))
         
-        for strategy_name, strategy_func in strategies:
-            try:
-                chunks = await strategy_func(base_url)
+        start_next()
+        try:
+            while True:
+                pending = [attempt for attempt in attempts if not attempt.done()]
+                can_hedge = len(attempts) < len(candidates)
+                if pending:
+                    done, _ = await asyncio.wait(
+                        pending,
+                        timeout=self.settings.format_hedge_delay if can_hedge else None,
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not done:
+                        logger.info("Format attempt is slow, hedging with the next format")
+                        start_next()
+                        continue
                 
-                if chunks:
-                    # Calculate total content length
-                    total_length = sum(len(chunk.page_content) for chunk in chunks)
-                    
-                    if total_length > best_content_length:
-                        best_chunks = chunks
-                        best_content_length = total_length
-                        print(f"✅ Best format so far: {strategy_name} ({total_length} chars)")
-                        
-                        # If we get substantial content, we can stop
-                        if total_length > 5000:
-                            break
-                            
-            except Exception as e:
-                print(f"❌ {strategy_name} failed: {str(e)}")
-                continue
+                for index, attempt in enumerate(attempts):
+                    if index not in results and attempt.done():
+                        results[index] = attempt.result()
                 
-        return best_chunks
-
-    async def _try_html_format(self, url: str) -> List[Document]:
-        """Try to get HTML format of the filing."""
-        # Convert XBRL URLs to direct HTML
-        if "/ix?doc=" in url:
-            # Extract the document path and convert to direct HTML
-            doc_path = url.split("/ix?doc=")[1]
-            # Remove any query parameters
-            doc_path = doc_path.split('?')[0]
-            html_url = f"https://www.sec.gov{doc_path}"
-        else:
-            html_url = url
+                # Accept a format only once every higher-priority one has finished
+                for index in range(len(attempts)):
+                    if index not in results:
+                        break
+                    strategy_name, chunks, total_length = results[index]
+                    if total_length > 5000:
+                        logger.info("Using %s format (%d chars)", strategy_name, total_length)
+                        return chunks
+                else:
+                    if can_hedge:
+                        start_next()
+                        continue
+                    strategy_name, chunks, total_length = max(results.values(), key=lambda result: result[2])
+                    logger.info("Using %s format (%d chars)", strategy_name, total_length)
+                    return chunks
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+    
+    def _format_candidates(
+        self,
+        url: str
+    ) -> List[Tuple[str, Callable[[str], Awaitable[List[Document]]], str]]:
+        """
+        List the format strategies to try, in priority order.
+        
+        For plain document URLs the direct HTML URL is the original URL, so
+        the original format is only tried for XBRL viewer URLs.
+        
+        Args:
+            url: Original filing URL
             
-        print(f"🔍 Trying HTML direct URL: {html_url}")
+        Returns:
+            List of (strategy name, strategy function, URL) tuples with unique URLs
+        """
+        # Convert XBRL viewer URLs (/ix?doc=/Archives/edgar/...) to direct HTML
+        viewer_match = _XBRL_VIEWER_RE.search(url)
+        html_url = f"https://www.sec.gov{viewer_match.group(1)}" if viewer_match else url
+        
+        candidates = [
+            ("HTML Direct", self._try_html_format, html_url),
+            ("Text Format", self._try_text_format, _HTML_EXTENSION_RE.sub(".txt", html_url)),
+            ("Original Format", self._try_original_format, url)
+        ]
+        
+        seen_urls = set()
+        unique_candidates = []
+        for candidate in candidates:
+            if candidate[2] not in seen_urls:
+                seen_urls.add(candidate[2])
+                unique_candidates.append(candidate)
+        return unique_candidates
+    
+    async def _safe_try(
+        self,
+        strategy_name: str,
+        strategy_func: Callable[[str], Awaitable[List[Document]]],
+        url: str
+    ) -> Tuple[str, List[Document], int]:
+        """
+        Run one format strategy, treating failures as empty results.
+        
+        Args:
+            strategy_name: Name of the strategy, for logging
+            strategy_func: Strategy coroutine function
+            url: URL to fetch for this format
+            
+        Returns:
+            Tuple of strategy name, document chunks and total content length
+        """
+        try:
+            chunks = await strategy_func(url)
+        except Exception as e:
+            logger.warning("%s failed: %s", strategy_name, e)
+            return strategy_name, [], 0
+        
+        return strategy_name, chunks, sum(len(chunk.page_content) for chunk in chunks)
+
+    async def _try_html_format(self, html_url: str) -> List[Document]:
+        """Try to get HTML format of the filing from its direct document URL."""
+        logger.info("Trying HTML direct URL: %s", html_url)
         raw_content = await self._fetch_document(html_url)
         
         # Validate we got actual filing content, not XBRL viewer
-        if "viewing request" in raw_content.lower() and len(raw_content) < 5000:
+        if len(raw_content) < 5000 and "viewing request" in raw_content.lower():
             raise DocumentProcessingError("HTML format returned XBRL viewer or insufficient content")
         
-        cleaned_text = self._parse_sec_filing(raw_content)
-        metadata = self._extract_filing_metadata(raw_content, html_url)
-        metadata["format"] = "HTML Direct"
-        
-        return self._create_chunks(cleaned_text, metadata)
+        return await asyncio.to_thread(self._chunk_html, raw_content, html_url, "HTML Direct")
 
-    async def _try_text_format(self, url: str) -> List[Document]:
-        """Try to get text format of the filing."""
-        # Convert to .txt format with better path handling
-        if "/ix?doc=" in url:
-            # Extract path from XBRL URL: /ix?doc=/Archives/edgar/...
-            doc_path = url.split("/ix?doc=")[1]
-            # Remove any query parameters and convert to .txt
-            doc_path = doc_path.split('?')[0]  # Remove query params
-            if doc_path.endswith('.htm') or doc_path.endswith('.html'):
-                doc_path = doc_path.rsplit('.', 1)[0] + '.txt'
-            txt_url = f"https://www.sec.gov{doc_path}"
-        elif url.endswith('.htm') or url.endswith('.html'):
-            txt_url = url.rsplit('.', 1)[0] + '.txt'
-        else:
-            txt_url = url
-            
-        print(f"🔍 Trying text format URL: {txt_url}")
+    async def _try_text_format(self, txt_url: str) -> List[Document]:
+        """Try to get text format of the filing from its .txt URL."""
+        logger.info("Trying text format URL: %s", txt_url)
         raw_content = await self._fetch_document(txt_url)
         
         # Validate we got actual filing content, not error pages
-        if len(raw_content) < 1000 or ("viewing request" in raw_content.lower() and len(raw_content) < 5000):
+        if len(raw_content) < 1000 or (len(raw_content) < 5000 and "viewing request" in raw_content.lower()):
             raise DocumentProcessingError("Text format returned insufficient content")
         
         # Text format needs minimal processing
-        cleaned_text = self._clean_text(raw_content)
-        metadata = self._extract_text_filing_metadata(raw_content, txt_url)
-        metadata["format"] = "Text Format"
-        
-        return self._create_chunks(cleaned_text, metadata)
+        return await asyncio.to_thread(self._chunk_text, raw_content, txt_url)
 
     async def _try_original_format(self, url: str) -> List[Document]:
         """Try the original URL as provided."""
         raw_content = await self._fetch_document(url)
-        cleaned_text = self._parse_sec_filing(raw_content)
-        metadata = self._extract_filing_metadata(raw_content, url)
-        metadata["format"] = "Original"
+        return await asyncio.to_thread(self._chunk_html, raw_content, url, "Original")
+
+    def _chunk_html(self, content: str, url: str, format_name: str) -> List[Document]:
+        """
+        Parse and chunk an HTML filing.
+        
+        CPU-bound; run it in a worker thread so parsing does not block the
+        event loop. lxml releases the GIL while parsing and each worker
+        thread has its own parser, so filings fetched concurrently are
+        parsed in parallel.
+        
+        Args:
+            content: Raw filing content
+            url: Filing URL
+            format_name: Name of the format strategy, stored in the metadata
+            
+        Returns:
+            List of document chunks
+        """
+        cleaned_text, metadata = self._parse_and_extract(content, url)
+        metadata["format"] = format_name
+        
+        return self._create_chunks(cleaned_text, metadata)
+
+    def _chunk_text(self, content: str, url: str) -> List[Document]:
+        """
+        Clean and chunk a plain-text filing; run it in a worker thread.
+        
+        Args:
+            content: Raw filing content
+            url: Filing URL
+            
+        Returns:
+            List of document chunks
+        """
+        cleaned_text = self._clean_text(content)
+        metadata = self._extract_text_filing_metadata(content, url)
+        metadata["format"] = "Text Format"
         
         return self._create_chunks(cleaned_text, metadata)
 
@@ -179,24 +375,9 @@ class DocumentProcessor:
         """Extract metadata from text format SEC filing."""
         metadata = {"source_url": url}
         
-        try:
-            # Text format has structured headers
-            lines = content.split('\n')[:50]  # Check first 50 lines
-            
-            for line in lines:
-                line = line.strip()
-                
-                if line.startswith("COMPANY CONFORMED NAME:"):
-                    metadata["company_name"] = line.split(":", 1)[1].strip()
-                elif line.startswith("FORM TYPE:"):
-                    metadata["form_type"] = line.split(":", 1)[1].strip()
-                elif line.startswith("FILED AS OF DATE:"):
-                    metadata["filing_date"] = line.split(":", 1)[1].strip()
-                elif line.startswith("PERIOD OF REPORT:"):
-                    metadata["period_end_date"] = line.split(":", 1)[1].strip()
-                    
-        except Exception:
-            pass
+        # Text format has structured headers at the top of the submission
+        for match in _TEXT_HEADER_RE.finditer(content, 0, _TEXT_HEADER_CHARS):
+            metadata[_TEXT_HEADER_KEYS[match.group(1)]] = match.group(2).strip()
             
         return metadata
     
@@ -216,14 +397,14 @@ class DocumentProcessor:
             raise DocumentProcessingError("Invalid URL format")
             
         # Check if it's an SEC domain
-        valid_domains = ["sec.gov", "www.sec.gov"]
-        if parsed.netloc.lower() not in valid_domains:
+        if parsed.netloc.lower() not in _SEC_DOMAINS:
             raise DocumentProcessingError("URL must be from sec.gov domain")
             
-        # Check for common SEC filing paths
-        valid_paths = ["/Archives/edgar/", "/ix?doc="]
-        url_string = str(url).lower()
-        if not any(path.lower() in url_string for path in valid_paths):
+        # Check for common SEC filing paths: EDGAR archives, or the XBRL
+        # viewer whose document path is in the query string
+        is_archive = parsed.path.lower().startswith("/archives/edgar/")
+        is_viewer = parsed.path == "/ix" and parsed.query.startswith("doc=")
+        if not (is_archive or is_viewer):
             raise DocumentProcessingError("URL does not appear to be a SEC filing")
     
     async def _fetch_document(self, url: str) -> str:
@@ -239,37 +420,47 @@ class DocumentProcessor:
         Raises:
             DocumentProcessingError: If document cannot be fetched
         """
-        headers = {
-            "User-Agent": "AI SEC Filing Analyzer v1.0 Educational Research Tool - Contact: developer@example.com",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate",
-            "Connection": "keep-alive",
-            "From": "developer@example.com"
-        }
-        
         try:
-            async with httpx.AsyncClient(
-                timeout=self.settings.request_timeout,
-                follow_redirects=True
-            ) as client:
-                response = await client.get(url, headers=headers)
+            cached = await asyncio.to_thread(self._filing_cache.get, url)
+            headers = {}
+            if cached is not None:
+                etag, last_modified, _ = cached
+                if etag:
+                    headers["If-None-Match"] = etag
+                if last_modified:
+                    headers["If-Modified-Since"] = last_modified
+            
+            # Stream the body so the filing is buffered once as bytes and
+            # decoded once, rather than held as both by the response
+            async with self._get_http_client().stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and cached is not None:
+                    logger.info("Filing not modified, using cached copy: %s", url)
+                    return cached[2]
+                
+                if response.is_error:
+                    await response.aread()
                 response.raise_for_status()
                 
-                # Handle different content types
                 content_type = response.headers.get("content-type", "").lower()
-                
-                if "text/html" in content_type or "text/xml" in content_type:
-                    return response.text
-                elif "text/plain" in content_type:
-                    return response.text
-                else:
-                    # Try to decode as text anyway
-                    try:
-                        return response.text
-                    except:
-                        raise DocumentProcessingError(f"Unsupported content type: {content_type}")
-                        
+                body = bytearray()
+                async for chunk in response.aiter_bytes(65536):
+                    body += chunk
+                encoding = response.encoding or "utf-8"
+                etag = response.headers.get("etag")
+                last_modified = response.headers.get("last-modified")
+            
+            try:
+                content = body.decode(encoding, errors="replace")
+            except LookupError:
+                raise DocumentProcessingError(f"Unsupported content type: {content_type}")
+            
+            if etag or last_modified:
+                await asyncio.to_thread(
+                    self._filing_cache.set, url, (etag, last_modified, content)
+                )
+            
+            return content
+                    
         except httpx.TimeoutException:
             raise DocumentProcessingError("Request timeout while fetching document")
         except httpx.HTTPStatusError as e:
@@ -277,34 +468,64 @@ class DocumentProcessor:
         except Exception as e:
             raise DocumentProcessingError(f"Failed to fetch document: {str(e)}")
     
-    def _parse_sec_filing(self, content: str) -> str:
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating an owned one if none was injected."""
+        if self._http_client is None:
+            self._http_client = create_http_client(self.settings)
+            self._owns_http_client = True
+        return self._http_client
+    
+    async def aclose(self) -> None:
+        """Close the HTTP client if this processor created it."""
+        if self._owns_http_client and self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+    
+    def _parse_and_extract(self, content: str, url: str) -> Tuple[str, Dict[str, str]]:
         """
-        Parse and clean SEC filing content.
+        Parse SEC filing HTML once into cleaned text and metadata.
         
         Args:
             content: Raw filing content
+            url: Filing URL
             
         Returns:
-            Cleaned text content
+            Tuple of cleaned text content and metadata dictionary
         """
-        # Parse HTML/XML content (suppress warnings for mixed content)
-        import warnings
-        from bs4 import XMLParsedAsHTMLWarning
-        warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+        # Read header fields from the raw head of the filing first, and only
+        # scan the full extracted text when the head has none of them
+        metadata = self._match_metadata(content[:_HEADER_SCAN_CHARS], url)
         
-        soup = BeautifulSoup(content, 'lxml')
+        tree = html.fromstring(content.encode("utf-8"), parser=_html_parser())
+        etree.strip_elements(tree, "script", "style", "meta", "link", with_tail=False)
+        text = tree.text_content()
         
-        # Remove unwanted elements
-        for tag in soup.find_all(['script', 'style', 'meta', 'link']):
-            tag.decompose()
+        # Header fields are matched before cleaning, which joins lines
+        if len(metadata) == 1:
+            metadata = self._match_metadata(text, url)
         
-        # Extract text content
-        text = soup.get_text()
+        return self._clean_text(text), metadata
+    
+    def _match_metadata(self, text: str, url: str) -> Dict[str, str]:
+        """
+        Extract SEC header fields from text, keeping the first occurrence of each.
         
-        # Clean up the text
-        text = self._clean_text(text)
+        Args:
+            text: Filing text or raw content to scan
+            url: Filing URL
+            
+        Returns:
+            Metadata dictionary
+        """
+        metadata = {"source_url": url}
+        for match in _METADATA_RE.finditer(text):
+            key = match.lastgroup
+            if key not in metadata:
+                metadata[key] = match.group(key).strip()
+                if _METADATA_KEYS.issubset(metadata):
+                    break
         
-        return text
+        return metadata
     
     def _clean_text(self, text: str) -> str:
         """
@@ -316,74 +537,20 @@ class DocumentProcessor:
         Returns:
             Cleaned text
         """
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
+        # Remove control characters (a C-level table lookup, no regex)
+        text = text.translate(_CTRL_TRANSLATE)
         
-        # Remove control characters
-        text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+        # Collapse whitespace, including line breaks, to single spaces
+        text = _WS_RE.sub(' ', text)
         
         # Remove repeated punctuation
-        text = re.sub(r'([.!?])\1+', r'\1', text)
-        
-        # Normalize line breaks
-        text = re.sub(r'\n\s*\n', '\n\n', text)
+        text = _REPEAT_PUNCT_RE.sub(r'\1', text)
         
         # Remove leading/trailing whitespace
         text = text.strip()
         
         return text
     
-    def _extract_filing_metadata(self, content: str, url: str) -> Dict[str, str]:
-        """
-        Extract metadata from SEC filing.
-        
-        Args:
-            content: Raw filing content
-            url: Filing URL
-            
-        Returns:
-            Metadata dictionary
-        """
-        # Suppress XML warnings for metadata parsing too
-        import warnings
-        from bs4 import XMLParsedAsHTMLWarning
-        warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
-        
-        soup = BeautifulSoup(content, 'lxml')
-        metadata = {"source_url": url}
-        
-        # Try to extract common SEC filing metadata
-        try:
-            # Look for company name
-            company_tag = soup.find(text=re.compile(r"COMPANY\s+CONFORMED\s+NAME:", re.I))
-            if company_tag:
-                company_line = company_tag.parent.get_text() if company_tag.parent else str(company_tag)
-                company_match = re.search(r"COMPANY\s+CONFORMED\s+NAME:\s*(.+)", company_line, re.I)
-                if company_match:
-                    metadata["company_name"] = company_match.group(1).strip()
-            
-            # Look for filing type
-            form_tag = soup.find(text=re.compile(r"FORM\s+TYPE:", re.I))
-            if form_tag:
-                form_line = form_tag.parent.get_text() if form_tag.parent else str(form_tag)
-                form_match = re.search(r"FORM\s+TYPE:\s*(.+)", form_line, re.I)
-                if form_match:
-                    metadata["form_type"] = form_match.group(1).strip()
-            
-            # Look for filing date
-            date_tag = soup.find(text=re.compile(r"FILED\s+AS\s+OF\s+DATE:", re.I))
-            if date_tag:
-                date_line = date_tag.parent.get_text() if date_tag.parent else str(date_tag)
-                date_match = re.search(r"FILED\s+AS\s+OF\s+DATE:\s*(.+)", date_line, re.I)
-                if date_match:
-                    metadata["filing_date"] = date_match.group(1).strip()
-                    
-        except Exception:
-            # If metadata extraction fails, continue with basic metadata
-            pass
-        
-        return metadata
-    
     def _create_chunks(self, text: str, metadata: Dict[str, str]) -> List[Document]:
         """
         Split text into chunks for vector embedding.
@@ -396,27 +563,30 @@ class DocumentProcessor:
             List of document chunks
         """
         # Split text into chunks
-        chunks = self.text_splitter.split_text(text)
+        chunks = self.text_splitter.chunks(text)
         
-        # Create Document objects with metadata
+        # Create Document objects with metadata, stopping once the chunk
+        # limit is reached to prevent memory issues. The splitter trims
+        # whitespace, so chunks are stored as returned.
         documents = []
+        max_chunks = self.settings.max_chunks
+        total_chunks = len(chunks)
         for i, chunk in enumerate(chunks):
-            if len(chunk.strip()) > 50:  # Skip very short chunks
-                chunk_metadata = metadata.copy()
-                chunk_metadata.update({
+            if len(documents) >= max_chunks:
+                break
+            if len(chunk) <= 50:  # Skip very short chunks
+                continue
+            
+            documents.append(Document(
+                page_content=chunk,
+                metadata={
+                    **metadata,
                     "chunk_id": i,
                     "chunk_length": len(chunk),
-                    "total_chunks": len(chunks)
-                })
-                
-                documents.append(Document(
-                    page_content=chunk,
-                    metadata=chunk_metadata
-                ))
-        
-        # Limit number of chunks to prevent memory issues
-        if len(documents) > self.settings.max_chunks:
-            documents = documents[:self.settings.max_chunks]
+                    "n_tokens": estimate_tokens(chunk),
+                    "total_chunks": total_chunks
+                }
+            ))
         
         return documents
     
@@ -431,6 +601,10 @@ class DocumentProcessor:
         Returns:
             Path to temporary file
         """
-        with tempfile.NamedTemporaryFile(mode='w', suffix=suffix, delete=False) as f:
-            f.write(content)
-            return f.name 
\ No newline at end of file
+        fd, path = await asyncio.to_thread(tempfile.mkstemp, suffix=suffix)
+        os.close(fd)
+        
+        async with aiofiles.open(path, mode='w') as f:
+            await f.write(content)
+        
+        return path 
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""
+Extractive Fast Path for common financial questions.
+
+Canonical questions such as "What were total revenues?" can often be answered
+directly from the most relevant chunk by pattern matching, without calling
+the LLM. Only whole canonical questions are recognized, optionally closed by
+a reporting period. Extraction only succeeds when the metric's label is
+followed by its reported amount rather than by a change in it, and when the
+clause stating the amount names any year or quarter the question asked
+about; otherwise the question falls through to Gemini.
+"""
+
+import re
+from typing import List, Match, NamedTuple, Optional, Pattern, Tuple
+
+from langchain_core.documents import Document
+
+
+# Dollar amounts such as "$85.8 billion", "$ 1,234" or "$6.08"
+_AMOUNT = r"\$\s?\d[\d,]*(?:\.\d+)?(?:\s*(?:thousand|million|billion))?"
+
+# Maximum characters allowed between a metric label and its amount
+_MAX_GAP = 80
+
+# Leading part of a canonical question: "What were the company's ..."
+_QUESTION_HEAD = (
+    r"^\s*what\s+(?:was|were|is|are)\s+(?:the\s+)?"
+    r"(?:[\w.&-]+['’]s?\s+)?(?:current\s+|reported\s+)?"
+)
+
+# Optional reporting period closing a canonical question: a named period
+# such as "for Q3 2024", "in fiscal 2024", "for FY24" or "during the third
+# quarter of 2024", whose quarter and year are captured, or the current
+# period such as "for the reporting period". Nothing else may follow the
+# metric, so qualifiers like "for the segment" or "in Europe" fall through.
+_QUESTION_PERIOD = (
+    r"(?:\s+(?:for|in|during|as\s+of)\s+(?:the\s+)?(?:"
+    r"(?:q(?P<quarter>[1-4])\s+|(?P<quarter_word>first|second|third|fourth)\s+quarter\s+(?:of\s+)?)?"
+    r"(?:(?:fiscal\s+(?:year\s+)?)?(?P<year>\d{4})|fy\s?(?P<fiscal_year>\d{4}|\d{2}))"
+    r"|(?:this\s+|current\s+|reporting\s+|most\s+recent\s+)*(?:period|quarter|fiscal\s+year|year)"
+    r"))?"
+)
+
+_QUARTER_WORDS = ("first", "second", "third", "fourth")
+
+# Characters ending the clause that states an amount's period
+_CLAUSE_BREAKS = (". ", ";", "$")
+
+# Words between a label and an amount showing the amount is a change, as in
+# "net income decreased by $3.0 billion", rather than the reported value
+_CHANGE_RE = re.compile(
+    r"\b(?:increase[ds]?|decrease[ds]?|rose|fell|declined?|grew|growth|up|down|"
+    r"by|change[ds]?|compared|versus|vs)\b|%",
+    re.IGNORECASE
+)
+
+
+class FastPathAnswer(NamedTuple):
+    """Answer extracted without calling the LLM."""
+
+    answer: str
+    confidence_score: float
+
+
+class _Metric(NamedTuple):
+    """A financial metric that can be extracted by pattern matching."""
+
+    label: str
+    question: Pattern
+    value: Pattern
+
+
+def _metric(label: str, question: str, text: str) -> _Metric:
+    """Compile the whole-question and value patterns for a metric."""
+    return _Metric(
+        label=label,
+        question=re.compile(
+            rf"{_QUESTION_HEAD}(?:{question}){_QUESTION_PERIOD}\s*\??\s*$",
+            re.IGNORECASE
+        ),
+        value=re.compile(
+            rf"(?:{text})([^$.]{{0,{_MAX_GAP}}}?)({_AMOUNT})",
+            re.IGNORECASE
+        )
+    )
+
+
+_METRICS: Tuple[_Metric, ...] = (
+    _metric(
+        "total revenue",
+        r"(?:total\s+)?(?:net\s+)?(?:revenues?|sales)",
+        r"total\s+(?:net\s+)?(?:revenues?|net\s+sales)|total\s+net\s+sales"
+    ),
+    _metric(
+        "net income",
+        r"net\s+income",
+        r"net\s+income"
+    ),
+    _metric(
+        "diluted earnings per share",
+        r"(?:diluted\s+)?(?:earnings\s+per\s+share|eps)",
+        r"diluted\s+(?:earnings|net\s+income)\s+per\s+share|earnings\s+per\s+share"
+    ),
+    _metric(
+        "cash and cash equivalents",
+        r"(?:total\s+)?cash\s+and\s+cash\s+equivalents",
+        r"cash\s+and\s+cash\s+equivalents"
+    ),
+)
+
+
+def extract_answer(question: str, documents: List[Document]) -> Optional[FastPathAnswer]:
+    """
+    Answer a canonical financial question from the top-ranked chunk.
+
+    Args:
+        question: User's question
+        documents: Retrieved chunks, most relevant first
+
+    Returns:
+        FastPathAnswer if the question is a canonical question about a known
+        metric and the top chunk states its value, otherwise None
+    """
+    if not documents:
+        return None
+
+    top_chunk = documents[0].page_content
+    for metric in _METRICS:
+        question_match = metric.question.match(question)
+        if not question_match:
+            continue
+
+        period = _requested_period(question_match)
+        for match in metric.value.finditer(top_chunk):
+            if _CHANGE_RE.search(match.group(1)):
+                continue
+            clause = _period_clause(top_chunk, match)
+            if not all(pattern.search(clause) for pattern in period):
+                continue
+            sentence = _enclosing_sentence(top_chunk, match.start(), match.end())
+            return FastPathAnswer(
+                answer=(
+                    f"According to the filing, {metric.label} was {match.group(2)}.\n\n"
+                    f"Source excerpt: \"{sentence}\""
+                ),
+                confidence_score=0.9
+            )
+        return None
+
+    return None
+
+
+def _requested_period(question_match: Match) -> List[Pattern]:
+    """
+    Build patterns for the quarter and year a question names.
+
+    Args:
+        question_match: Match of a canonical question pattern
+
+    Returns:
+        Patterns that must all occur in the clause stating the amount; empty
+        when the question names no specific period
+    """
+    patterns = []
+
+    year = question_match.group("year") or question_match.group("fiscal_year")
+    if year:
+        if len(year) == 2:
+            year = f"20{year}"
+        patterns.append(re.compile(rf"\b(?:{year}|fy\s?{year[2:]})\b", re.IGNORECASE))
+
+    quarter = question_match.group("quarter")
+    if question_match.group("quarter_word"):
+        quarter = str(_QUARTER_WORDS.index(question_match.group("quarter_word").lower()) + 1)
+    if quarter:
+        word = _QUARTER_WORDS[int(quarter) - 1]
+        patterns.append(re.compile(rf"\bq{quarter}\b|\b{word}\s+quarter\b", re.IGNORECASE))
+
+    return patterns
+
+
+def _period_clause(text: str, match: Match) -> str:
+    """
+    Return the clause of the text that states the period of a matched amount.
+
+    The clause runs from the end of the previous clause or amount, through
+    the label, up to the next clause break or amount, so the period of a
+    neighbouring figure ("... $97.0 billion in 2023") is not attributed to
+    this one.
+    """
+    clause_start = max(text.rfind(separator, 0, match.start()) for separator in _CLAUSE_BREAKS) + 1
+    clause_ends = [text.find(separator, match.end()) for separator in _CLAUSE_BREAKS]
+    clause_end = min((end for end in clause_ends if end != -1), default=len(text))
+    return text[clause_start:match.start(2)] + text[match.end():clause_end]
+
+
+def _enclosing_sentence(text: str, start: int, end: int) -> str:
+    """Return the sentence of the text that contains the span [start, end)."""
+    sentence_start = text.rfind(". ", 0, start) + 1
+    sentence_end = text.find(". ", end)
+    if sentence_end == -1:
+        sentence_end = len(text)
+    return " ".join(text[sentence_start:sentence_end + 1].split())
@@ -0,0 +1,195 @@
+"""
+ONNX Runtime Embedder for SEC Filing Analysis.
+
+This service runs an INT8-quantized ONNX export of the sentence-transformer
+embedding model on CPU, as a drop-in replacement for SentenceTransformer.
+
+The export is created on first use with ``export_quantized_model``, or ahead
+of time with optimum:
+
+    optimum-cli export onnx --task sentence-similarity \\
+        --model sentence-transformers/all-MiniLM-L6-v2 out/
+    optimum-cli onnxruntime quantize --avx512_vnni --onnx_model out/ -o out-int8/
+"""
+
+import os
+from typing import List, Optional, Union
+
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+
+def export_quantized_model(model_name: str, output_dir: str) -> str:
+    """
+    Export a Hugging Face embedding model to ONNX with dynamic INT8 quantization.
+
+    Quantization targets AVX-512 VNNI, whose int8 dot-product instructions
+    run the model's matrix multiplications several times faster than FP32
+    on recent x86 CPUs.
+
+    Args:
+        model_name: Hugging Face model name or path
+        output_dir: Directory to write the quantized model and tokenizer to
+
+    Returns:
+        The output directory
+    """
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    quantizer = ORTQuantizer.from_pretrained(model)
+    quantizer.quantize(
+        save_dir=output_dir,
+        quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    )
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+    return output_dir
+
+
+class OnnxEmbedder:
+    """
+    Sentence embedder backed by an ONNX Runtime inference session.
+
+    Exposes the subset of the SentenceTransformer interface used by the
+    vector manager, so either backend can be plugged in.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        max_seq_length: int = 256,
+        num_threads: Optional[int] = None,
+        concurrency: int = 1
+    ):
+        """
+        Initialize ONNX embedder.
+
+        Args:
+            model_dir: Directory holding the exported ONNX model and tokenizer
+            max_seq_length: Maximum number of tokens per input text
+            num_threads: Intra-op threads; defaults to the CPUs divided
+                between the concurrent callers
+            concurrency: Number of threads that run the session concurrently
+        """
+        self.max_seq_length = max_seq_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        session_options = ort.SessionOptions()
+        session_options.enable_cpu_mem_arena = True
+        # Concurrent runs each get their own share of the cores rather than
+        # all of them, which would oversubscribe the CPU
+        session_options.intra_op_num_threads = (
+            num_threads or max(1, (os.cpu_count() or 1) // max(1, concurrency))
+        )
+        session_options.inter_op_num_threads = 1
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(
+            self._find_model_file(model_dir),
+            sess_options=session_options,
+            providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self._output_names = [output.name for output in self.session.get_outputs()]
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = False,
+        convert_to_numpy: bool = True
+    ) -> np.ndarray:
+        """
+        Generate embeddings for one or more texts.
+
+        Texts are sorted by length and encoded in mini-batches of similar
+        length, so little work is spent on padding tokens. Embeddings are
+        returned in the original order.
+
+        Args:
+            sentences: Text or list of texts to embed
+            batch_size: Number of texts per forward pass
+            show_progress_bar: Accepted for SentenceTransformer compatibility
+            normalize_embeddings: Whether to L2-normalize the embeddings
+            convert_to_numpy: Accepted for SentenceTransformer compatibility
+
+        Returns:
+            Array of shape (len(sentences), dimension), or (dimension,) for a single text
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, self.get_sentence_embedding_dimension() or 0), dtype=np.float32)
+
+        order = np.argsort([len(text) for text in texts], kind="stable")
+
+        # Each batch is written straight into its rows of one preallocated
+        # matrix, so no list of batches is concatenated afterwards
+        embeddings = None
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            batch = self._encode_batch([texts[i] for i in rows])
+            if embeddings is None:
+                embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            embeddings[rows] = batch
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.clip(norms, 1e-12, None)
+
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Run one forward pass and pool token embeddings into sentence embeddings."""
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            # Aligned sequence lengths keep the int8 GEMMs on the
+            # vectorized kernels; pad positions are masked in pooling
+            pad_to_multiple_of=8,
+            return_tensors="np"
+        )
+        feeds = {
+            name: encoded[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self._input_names and name in encoded
+        }
+
+        outputs = dict(zip(self._output_names, self.session.run(None, feeds)))
+
+        if "sentence_embedding" in outputs:
+            embeddings = outputs["sentence_embedding"]
+        else:
+            # Mean pooling over non-padding tokens as a batched matrix
+            # product of the mask with the token embeddings, without
+            # materializing a masked copy of the hidden states
+            token_embeddings = outputs.get("token_embeddings", outputs[self._output_names[0]])
+            mask = feeds["attention_mask"].astype(np.float32)
+            summed = np.matmul(mask[:, np.newaxis, :], token_embeddings)[:, 0, :]
+            embeddings = summed / np.clip(mask.sum(axis=1, keepdims=True), 1e-9, None)
+
+        return embeddings.astype(np.float32, copy=False)
+
+    def get_sentence_embedding_dimension(self) -> Optional[int]:
+        """
+        Get the embedding dimension of the model.
+
+        Returns:
+            Embedding dimension, or None if the graph does not declare it
+        """
+        dimension = self.session.get_outputs()[-1].shape[-1]
+        return dimension if isinstance(dimension, int) else None
+
+    @staticmethod
+    def _find_model_file(model_dir: str) -> str:
+        """Locate the ONNX model file, preferring a quantized export."""
+        for file_name in ("model_quantized.onnx", "model.onnx"):
+            path = os.path.join(model_dir, file_name)
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"No ONNX model found in {model_dir}")
@@ -0,0 +1,137 @@
+"""
+Request Batcher for SEC Filing Analysis.
+
+This service coalesces concurrent analysis requests for the same filing
+into a single pipeline run and a single Gemini call.
+"""
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Dict, Hashable, List, Set, Tuple
+
+from app.models.schemas import AnalysisRequest, AnalysisResponse
+
+if TYPE_CHECKING:
+    from app.services.analyzer_service import AnalyzerService
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisBatcher:
+    """
+    Micro-batcher in front of the analyzer service.
+
+    Requests that share a filing and response options and arrive within
+    a short window are answered together. A lone request is processed as
+    usual once the window closes.
+    """
+
+    def __init__(
+        self,
+        analyzer: "AnalyzerService",
+        max_batch_size: int = 8,
+        max_queue_time: float = 0.05
+    ):
+        """
+        Initialize request batcher.
+
+        Args:
+            analyzer: Analyzer service that processes the batches
+            max_batch_size: Maximum number of questions per batch
+            max_queue_time: Seconds to wait for more requests before flushing
+        """
+        self.analyzer = analyzer
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+        self._pending: Dict[Hashable, List[Tuple[AnalysisRequest, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def process(self, request: AnalysisRequest) -> AnalysisResponse:
+        """
+        Queue a request and wait for its batch to be processed.
+
+        Args:
+            request: Analysis request
+
+        Returns:
+            AnalysisResponse: Analysis results for this request
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch_key = self._batch_key(request)
+
+        batch = self._pending.setdefault(batch_key, [])
+        batch.append((request, future))
+
+        if len(batch) >= self.max_batch_size:
+            self._flush(batch_key)
+        elif len(batch) == 1:
+            self._timers[batch_key] = loop.call_later(
+                self.max_queue_time, self._flush, batch_key
+            )
+
+        return await future
+
+    def _flush(self, batch_key: Hashable) -> None:
+        """Start processing the pending batch for a key."""
+        timer = self._timers.pop(batch_key, None)
+        if timer:
+            timer.cancel()
+
+        batch = self._pending.pop(batch_key, None)
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._process_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process_batch(self, batch: List[Tuple[AnalysisRequest, asyncio.Future]]) -> None:
+        """
+        Run the analysis for a batch and resolve every waiting request.
+
+        Args:
+            batch: Queued requests with the futures awaiting their results
+        """
+        request = batch[0][0]
+
+        try:
+            if len(batch) == 1:
+                results = [await self.analyzer.analyze_filing(
+                    filing_url=str(request.filing_url),
+                    question=request.question,
+                    filing_type=request.filing_type,
+                    include_context=request.include_context,
+                    max_response_length=request.max_response_length
+                )]
+            else:
+                logger.info("Processing batch of %d questions for %s", len(batch), request.filing_url)
+                results = await self.analyzer.analyze_filing_batch(
+                    filing_url=str(request.filing_url),
+                    questions=[queued.question for queued, _ in batch],
+                    filing_type=request.filing_type,
+                    include_context=request.include_context,
+                    max_response_length=request.max_response_length
+                )
+
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            # The client may have disconnected and cancelled its future
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _batch_key(request: AnalysisRequest) -> Hashable:
+        """Requests are batched only when everything but the question matches."""
+        return (
+            str(request.filing_url),
+            request.filing_type,
+            request.include_context,
+            request.max_response_length
+        )
@@ -0,0 +1,117 @@
+"""
+Semantic Cache for SEC Filing Analysis.
+
+This service caches analysis results keyed by question embeddings so that
+semantically equivalent questions about the same filing skip the full
+RAG pipeline.
+"""
+
+from functools import lru_cache
+from typing import Any, Hashable, List, Optional, Tuple
+
+import numpy as np
+from cachetools import LRUCache
+
+from app.core.config import get_settings
+
+
+class SemanticCache:
+    """
+    In-memory semantic cache for analysis results.
+
+    Entries are grouped into buckets (e.g. per filing URL). Each bucket holds
+    a matrix of L2-normalized question embeddings alongside the cached values,
+    so a lookup is a single matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        max_buckets: int = 10_000,
+        max_entries_per_bucket: int = 256
+    ):
+        """
+        Initialize semantic cache.
+
+        Args:
+            similarity_threshold: Minimum cosine similarity for a cache hit
+            max_buckets: Maximum number of buckets kept (LRU eviction)
+            max_entries_per_bucket: Maximum cached questions per bucket
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries_per_bucket = max_entries_per_bucket
+        self._buckets: LRUCache = LRUCache(maxsize=max_buckets)
+
+    def get(self, bucket: Hashable, embedding: np.ndarray) -> Optional[Any]:
+        """
+        Look up the closest cached value within a bucket.
+
+        Args:
+            bucket: Bucket key (e.g. filing URL)
+            embedding: Question embedding
+
+        Returns:
+            Cached value if a similar enough question exists, otherwise None
+        """
+        entry = self._buckets.get(bucket)
+        if entry is None:
+            return None
+
+        matrix, values = entry
+        similarities = matrix @ self._normalize(embedding)
+        best_index = int(np.argmax(similarities))
+
+        if similarities[best_index] >= self.similarity_threshold:
+            return values[best_index]
+        return None
+
+    def put(self, bucket: Hashable, embedding: np.ndarray, value: Any) -> None:
+        """
+        Store a value for a question embedding within a bucket.
+
+        Args:
+            bucket: Bucket key (e.g. filing URL)
+            embedding: Question embedding
+            value: Value to cache
+        """
+        vector = self._normalize(embedding)[np.newaxis, :]
+        entry: Optional[Tuple[np.ndarray, List[Any]]] = self._buckets.get(bucket)
+
+        if entry is None:
+            matrix, values = vector, [value]
+        else:
+            matrix = np.vstack([entry[0], vector])
+            values = entry[1] + [value]
+
+        # Drop the oldest entries once the bucket is full
+        if len(values) > self.max_entries_per_bucket:
+            matrix = matrix[-self.max_entries_per_bucket:]
+            values = values[-self.max_entries_per_bucket:]
+
+        self._buckets[bucket] = (matrix, values)
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        self._buckets.clear()
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        """Return a float32, L2-normalized copy of the embedding."""
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+
+@lru_cache()
+def get_semantic_cache() -> SemanticCache:
+    """
+    Get the process-wide semantic cache.
+
+    Returns:
+        SemanticCache: Shared cache instance
+    """
+    settings = get_settings()
+    return SemanticCache(
+        similarity_threshold=settings.semantic_cache_threshold,
+        max_buckets=settings.semantic_cache_size
+    )
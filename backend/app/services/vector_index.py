@@ -0,0 +1,206 @@
+"""
+Quantized Vector Index for SEC Filing Analysis.
+
+This module keeps an int8 copy of the chunk embeddings stored in ChromaDB in
+an in-process FAISS index. Nearest-neighbour search runs over vectors a
+quarter of the size of float32 ones, using FAISS's SIMD int8 distance
+kernels, while ChromaDB remains the store of record for chunk text, metadata
+and full-precision embeddings. Unfiltered searches walk an HNSW graph over
+the int8 vectors; searches restricted to one filing scan that filing's
+vectors exactly.
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+import orjson
+
+
+class QuantizedVectorIndex:
+    """
+    HNSW index over int8 scalar-quantized, normalized embeddings.
+
+    Embeddings are L2-normalized, so every component lies in [-1, 1]. The
+    quantizer is trained on that fixed range rather than on data, which
+    gives every dimension the same symmetric 8-bit scale and never needs
+    retraining as filings are added.
+
+    Rows are numbered in insertion order; the row number is the FAISS id and
+    indexes the list of ChromaDB ids.
+    """
+
+    INDEX_FILE = "int8_vectors.faiss"
+    IDS_FILE = "int8_vectors.json"
+
+    def __init__(
+        self,
+        dimension: int,
+        directory: str,
+        m: int = 32,
+        ef_construction: int = 200,
+        ef_search: int = 64
+    ):
+        """
+        Initialize an empty index.
+
+        Args:
+            dimension: Embedding dimension
+            directory: Directory the index is persisted in
+            m: Neighbours per node in the HNSW graph
+            ef_construction: Candidate list size while building the graph
+            ef_search: Candidate list size while searching; higher values
+                trade speed for recall
+        """
+        self.dimension = dimension
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._index_path = os.path.join(directory, self.INDEX_FILE)
+        self._ids_path = os.path.join(directory, self.IDS_FILE)
+        self._index = self._new_index()
+        self._ids: List[str] = []
+        self._rows_by_filing: Dict[str, List[int]] = {}
+
+    def _new_index(self) -> faiss.IndexHNSWSQ:
+        """Create an empty int8 HNSW index with the fixed [-1, 1] range."""
+        index = faiss.IndexHNSWSQ(
+            self.dimension,
+            faiss.ScalarQuantizer.QT_8bit,
+            self.m,
+            faiss.METRIC_INNER_PRODUCT
+        )
+        index.hnsw.efConstruction = self.ef_construction
+        index.hnsw.efSearch = self.ef_search
+        index.train(np.stack([
+            np.full(self.dimension, -1.0, dtype=np.float32),
+            np.full(self.dimension, 1.0, dtype=np.float32)
+        ]))
+        return index
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(
+        self,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        filing_urls: Sequence[Optional[str]]
+    ) -> None:
+        """
+        Add normalized embeddings under their ChromaDB ids.
+
+        Args:
+            ids: ChromaDB ids of the chunks
+            embeddings: Array of shape (len(ids), dimension)
+            filing_urls: Filing URL of each chunk, used for filtered search
+        """
+        first_row = len(self._ids)
+        self._index.add(np.ascontiguousarray(embeddings, dtype=np.float32))
+        self._ids.extend(ids)
+
+        for row, filing_url in enumerate(filing_urls, first_row):
+            if filing_url is not None:
+                self._rows_by_filing.setdefault(filing_url, []).append(row)
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        k: int,
+        filing_url: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the stored chunks with the highest inner product with the query.
+
+        Args:
+            query_embedding: Normalized query embedding
+            k: Number of chunks to return
+            filing_url: Restrict the search to chunks of this filing
+
+        Returns:
+            List of (ChromaDB id, inner product) tuples, best first
+        """
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(1, -1)
+
+        if filing_url is None:
+            k = min(k, len(self._ids))
+            if k == 0:
+                return []
+            scores, rows = self._index.search(query, k, params=faiss.SearchParametersHNSW(efSearch=self.ef_search))
+        else:
+            # A filing is a small fraction of the graph, where a filtered
+            # graph walk can miss neighbours; scan its int8 vectors exactly
+            filing_rows = self._rows_by_filing.get(filing_url, [])
+            k = min(k, len(filing_rows))
+            if k == 0:
+                return []
+            selector = faiss.IDSelectorBatch(np.asarray(filing_rows, dtype=np.int64))
+            storage = faiss.downcast_index(self._index.storage)
+            scores, rows = storage.search(query, k, params=faiss.SearchParameters(sel=selector))
+
+        return [
+            (self._ids[row], float(score))
+            for row, score in zip(rows[0], scores[0])
+            if row >= 0
+        ]
+
+    def reset(self) -> None:
+        """Remove all vectors."""
+        self._index = self._new_index()
+        self._ids = []
+        self._rows_by_filing = {}
+
+    def snapshot(self) -> Tuple[np.ndarray, bytes]:
+        """
+        Serialize the index and its id mapping in memory.
+
+        Taking a snapshot is a memory copy, so callers can hold a lock
+        against concurrent adds while taking it and write it to disk later.
+
+        Returns:
+            Tuple of serialized index and serialized id mapping
+        """
+        mapping = orjson.dumps({"ids": self._ids, "rows_by_filing": self._rows_by_filing})
+        return faiss.serialize_index(self._index), mapping
+
+    def save(self, snapshot: Optional[Tuple[np.ndarray, bytes]] = None) -> None:
+        """
+        Persist the index and its id mapping.
+
+        Args:
+            snapshot: Snapshot to write; defaults to the current state
+        """
+        index_bytes, mapping = snapshot if snapshot is not None else self.snapshot()
+        # Write to temporary files and swap them in, so readers never see a
+        # partially written index
+        index_tmp = f"{self._index_path}.tmp"
+        ids_tmp = f"{self._ids_path}.tmp"
+        index_bytes.tofile(index_tmp)
+        with open(ids_tmp, "wb") as f:
+            f.write(mapping)
+        os.replace(index_tmp, self._index_path)
+        os.replace(ids_tmp, self._ids_path)
+
+    def load(self) -> bool:
+        """
+        Load a persisted index if one exists.
+
+        Returns:
+            True if an index was loaded
+        """
+        if not (os.path.exists(self._index_path) and os.path.exists(self._ids_path)):
+            return False
+
+        index = faiss.read_index(self._index_path)
+        if not isinstance(index, faiss.IndexHNSWSQ) or index.d != self.dimension:
+            return False
+        index.hnsw.efSearch = self.ef_search
+
+        with open(self._ids_path, "rb") as f:
+            mapping = orjson.loads(f.read())
+
+        self._index = index
+        self._ids = mapping["ids"]
+        self._rows_by_filing = mapping["rows_by_filing"]
+        return True
@@ -6,15 +6,90 @@ using ChromaDB and Hugging Face sentence transformers.
 """
 
 import os
+import asyncio
+import hashlib
 import logging
+import sqlite3
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
 from typing import List, Dict, Any, Optional, Tuple
+import diskcache
+import numpy as np
+from cachetools import LRUCache
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from sentence_transformers import SentenceTransformer
 from langchain_core.documents import Document
 
 from app.utils.exceptions import AIServiceError
+from app.utils.tokens import CHARS_PER_TOKEN
 from app.core.config import Settings
+from app.services.semantic_cache import SemanticCache
+from app.services.vector_index import QuantizedVectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+# Maximum number of ids per delete call when clearing the collection
+CLEAR_BATCH_SIZE = 10_000
+
+# Length buckets for embedding, as upper bounds on estimated tokens, and the
+# multiplier applied to the base batch size for each bucket plus the longest
+# texts beyond them: short chunks pack into large batches, long ones into
+# small batches that bound activation memory
+ENCODE_BUCKET_TOKENS = (64, 256)
+ENCODE_BATCH_MULTIPLIERS = (4.0, 1.0, 0.25)
+
+
+def maximal_marginal_relevance(
+    query_embedding: np.ndarray,
+    candidate_embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5
+) -> List[int]:
+    """
+    Select candidates that are relevant to the query yet diverse.
+    
+    Query and pairwise similarities are computed once as two matrix
+    products, and each candidate's similarity to the selected set is kept
+    as a running maximum, so every selection step is a few vector
+    operations rather than a Python loop over candidates.
+    
+    Args:
+        query_embedding: Normalized query embedding
+        candidate_embeddings: Normalized candidate embeddings, one per row
+        k: Number of candidates to select
+        lambda_mult: Trade-off between relevance (1.0) and diversity (0.0)
+        
+    Returns:
+        Row indices of the selected candidates in selection order
+    """
+    k = min(k, len(candidate_embeddings))
+    if k <= 0:
+        return []
+    
+    query_similarity = candidate_embeddings @ query_embedding
+    pairwise_similarity = candidate_embeddings @ candidate_embeddings.T
+    
+    # The most relevant candidate is always selected first
+    best = int(np.argmax(query_similarity))
+    selected = [best]
+    available = np.ones(len(candidate_embeddings), dtype=bool)
+    available[best] = False
+    redundancy = pairwise_similarity[:, best].copy()
+    
+    relevance = lambda_mult * query_similarity
+    for _ in range(k - 1):
+        scores = np.where(available, relevance - (1.0 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, pairwise_similarity[:, best], out=redundancy)
+    
+    return selected
 
 
 class VectorManager:
@@ -36,16 +111,72 @@ class VectorManager:
         self.embedding_model = None
         self.chroma_client = None
         self.collection = None
+        self.vector_index: Optional[QuantizedVectorIndex] = None
+        # Storage and search run in worker threads; FAISS indexes must not
+        # be searched while vectors are being added
+        self._index_lock = threading.Lock()
+        # The index is written to disk outside _index_lock, one save at a
+        # time, and only when it changed since the last save
+        self._index_save_lock = threading.Lock()
+        self._index_dirty = False
+        # One writer per filing, so concurrent ingestion of the same filing
+        # cannot add a chunk to ChromaDB and the search index twice
+        self._filing_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = (
+            weakref.WeakValueDictionary()
+        )
+        self._filing_locks_guard = threading.Lock()
+        self.embed_batch_size = settings.embed_batch_size or 16
+        # Dedicated workers for forward passes, so embedding neither blocks
+        # the event loop nor queues behind other to_thread work; the pool
+        # size bounds concurrent passes so request bursts don't
+        # oversubscribe the CPU threads of the embedding model
+        self._encode_executor = ThreadPoolExecutor(
+            max_workers=settings.embed_concurrency,
+            thread_name_prefix="embed"
+        )
+        # Embeddings of recent queries by exact text; retries and repeated
+        # questions skip the forward pass
+        self._query_embeddings: LRUCache = LRUCache(maxsize=settings.query_embedding_cache_size)
+        # Chunk embeddings keyed by content hash, persisted across restarts
+        # and collection clears; identical boilerplate in different filings
+        # is embedded once
+        self._chunk_embeddings = diskcache.Cache(
+            settings.embedding_cache_dir,
+            eviction_policy="least-recently-used"
+        )
+        # Search results for near-duplicate queries, bucketed by search
+        # parameters; invalidated whenever the collection changes
+        self._retrieval_cache = SemanticCache(
+            similarity_threshold=settings.retrieval_cache_threshold,
+            max_entries_per_bucket=settings.retrieval_cache_size
+        )
         
     async def initialize(self):
         """
         Initialize embedding model and vector database.
         
-        This is called separately from __init__ to handle async initialization.
+        This is called separately from __init__ to handle async initialization,
+        once at application startup; indexing and search assume it has
+        completed.
         """
         try:
+            if self.settings.torch_threads:
+                self._configure_cpu_threads(self.settings.torch_threads)
+            
             # Initialize embedding model
-            self.embedding_model = SentenceTransformer(self.settings.hf_model_name)
+            if self.settings.embedding_backend == "onnx-int8":
+                self.embedding_model = self._load_onnx_model()
+            else:
+                self.embedding_model = SentenceTransformer(self.settings.hf_model_name)
+                if self.embedding_model.device.type == "cuda":
+                    # FP16 halves memory traffic and runs on tensor cores
+                    self.embedding_model.half()
+                    # A single worker keeps forward passes from contending
+                    # for the GPU
+                    self._encode_executor.shutdown(wait=False)
+                    self._encode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+                    if not self.settings.embed_batch_size:
+                        self.embed_batch_size = 64
             
             # Initialize ChromaDB
             os.makedirs(self.settings.vector_db_path, exist_ok=True)
@@ -57,6 +188,7 @@ class VectorManager:
                     allow_reset=True
                 )
             )
+            self._enable_sqlite_wal(self.settings.vector_db_path)
             
             # Get or create collection
             self.collection = self.chroma_client.get_or_create_collection(
@@ -64,11 +196,113 @@ class VectorManager:
                 metadata={"description": "SEC Filing Analysis Embeddings"}
             )
             
-            logging.info(f"Vector manager initialized with model: {self.settings.hf_model_name}")
+            self._load_vector_index()
+            
+            logger.info("Vector manager initialized with model: %s", self.settings.hf_model_name)
             
         except Exception as e:
             raise AIServiceError(f"Failed to initialize vector manager: {str(e)}")
     
+    @staticmethod
+    def _configure_cpu_threads(num_threads: int) -> None:
+        """
+        Pin the CPU thread pools used for embedding inference.
+        
+        Only applied when TORCH_THREADS is set, so deployments running
+        several workers per host can divide the cores between them.
+        
+        Args:
+            num_threads: Threads for intra-op parallelism
+        """
+        # OMP_NUM_THREADS/MKL_NUM_THREADS are only read when torch is first
+        # imported, which has already happened; set_num_threads resizes the
+        # OpenMP and MKL pools of the running process instead
+        import torch
+        torch.set_num_threads(num_threads)
+        try:
+            # Requests are already concurrent; one inter-op thread avoids
+            # oversubscribing the cores
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Can only be set before torch runs its first parallel op
+            pass
+    
+    @staticmethod
+    def _enable_sqlite_wal(db_path: str) -> None:
+        """
+        Switch ChromaDB's SQLite store to write-ahead logging.
+        
+        With WAL, searches reading chunk text and metadata keep running
+        while filings are being indexed instead of waiting on the rollback
+        journal. The journal mode is stored in the database file, so it
+        applies to ChromaDB's own connections and persists across restarts.
+        
+        Args:
+            db_path: ChromaDB persistence directory
+        """
+        sqlite_path = os.path.join(db_path, "chroma.sqlite3")
+        if not os.path.exists(sqlite_path):
+            return
+        
+        try:
+            connection = sqlite3.connect(sqlite_path)
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            logger.warning("Could not enable WAL for ChromaDB: %s", e)
+    
+    def _load_vector_index(self) -> None:
+        """
+        Load the int8 HNSW search index, rebuilding it from ChromaDB if it
+        is missing or out of sync with the collection.
+        """
+        dimension = self.embedding_model.get_sentence_embedding_dimension()
+        if not dimension:
+            dimension = int(self.embedding_model.encode(["dimension probe"]).shape[-1])
+        
+        self.vector_index = QuantizedVectorIndex(
+            dimension,
+            self.settings.vector_db_path,
+            m=self.settings.hnsw_m,
+            ef_construction=self.settings.hnsw_ef_construction,
+            ef_search=self.settings.hnsw_ef_search
+        )
+        if self.vector_index.load() and len(self.vector_index) == self.collection.count():
+            return
+        
+        self.vector_index.reset()
+        stored = self.collection.get(include=["embeddings", "metadatas"])
+        if stored["ids"]:
+            logger.info("Rebuilding int8 search index from %d stored chunks", len(stored['ids']))
+            self.vector_index.add(
+                stored["ids"],
+                np.asarray(stored["embeddings"], dtype=np.float32),
+                [(metadata or {}).get("filing_url") for metadata in stored["metadatas"]]
+            )
+        self.vector_index.save()
+    
+    def _load_onnx_model(self):
+        """
+        Load the INT8-quantized ONNX embedding model, exporting it on first use.
+        
+        Returns:
+            OnnxEmbedder: Embedder running on onnxruntime
+        """
+        from app.services.onnx_embedder import OnnxEmbedder, export_quantized_model
+        
+        model_dir = self.settings.embedding_onnx_path
+        if not os.path.isdir(model_dir) or not os.listdir(model_dir):
+            logger.info("Exporting INT8 ONNX embedding model to %s", model_dir)
+            export_quantized_model(self.settings.hf_model_name, model_dir)
+        
+        return OnnxEmbedder(
+            model_dir,
+            num_threads=self.settings.torch_threads,
+            concurrency=self.settings.embed_concurrency
+        )
+    
     async def add_documents(self, documents: List[Document]) -> List[str]:
         """
         Add documents to vector database with embeddings.
@@ -82,49 +316,273 @@ class VectorManager:
         Raises:
             AIServiceError: If embeddings generation or storage fails
         """
-        if not self.embedding_model or not self.collection:
-            await self.initialize()
-            
         try:
+            # Content-addressed IDs are stable across processes, so chunks
+            # that are already stored are skipped instead of re-embedded
+            doc_ids = [self._document_id(doc) for doc in documents]
+            if not doc_ids:
+                return doc_ids
+            
+            chunks_by_id = dict(zip(doc_ids, documents))
+            stored = await asyncio.to_thread(self.collection.get, ids=list(chunks_by_id), include=[])
+            for doc_id in stored["ids"]:
+                chunks_by_id.pop(doc_id, None)
+            
+            if not chunks_by_id:
+                logger.info("All documents already stored in vector database")
+                return doc_ids
+            
+            ids = list(chunks_by_id)
+            new_documents = list(chunks_by_id.values())
+            
             # Extract text content for embedding
-            texts = [doc.page_content for doc in documents]
+            texts = [doc.page_content for doc in new_documents]
+            
+            # Generate embeddings; the float32 matrix is handed to ChromaDB
+            # as-is rather than boxed into nested lists of Python floats
+            embeddings = await self._encode_chunks(texts)
+            
+            # Prepare metadata for storage; ChromaDB stores scalars natively,
+            # anything else is stringified
+            metadatas = [
+                {
+                    key: value if isinstance(value, (str, int, float, bool)) else str(value)
+                    for key, value in doc.metadata.items()
+                }
+                for doc in new_documents
+            ]
             
-            # Generate embeddings
-            embeddings = self.embedding_model.encode(
+            # Add to collection
+            self._retrieval_cache.clear()
+            added = await asyncio.to_thread(
+                self._store_chunks,
+                ids,
+                embeddings,
                 texts,
-                show_progress_bar=False,
-                normalize_embeddings=True
-            ).tolist()
+                metadatas,
+                [doc.metadata.get("filing_url") for doc in new_documents]
+            )
+            await asyncio.to_thread(self._save_vector_index)
             
-            # Prepare metadata for storage
-            metadatas = []
-            ids = []
+            logger.info("Added %d documents to vector database", added)
+            return doc_ids
             
-            for i, doc in enumerate(documents):
-                # Create unique ID
-                doc_id = f"doc_{hash(doc.page_content + str(doc.metadata))}_{i}"
-                ids.append(doc_id)
-                
-                # Prepare metadata (ChromaDB requires string values)
-                metadata = {}
-                for key, value in doc.metadata.items():
-                    metadata[key] = str(value)
-                
-                metadatas.append(metadata)
+        except Exception as e:
+            raise AIServiceError(f"Failed to add documents to vector database: {str(e)}")
+    
+    def _store_chunks(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        filing_urls: List[Optional[str]]
+    ) -> int:
+        """
+        Write chunks to ChromaDB and the search index; blocking, run in a
+        worker thread.
+        
+        Chunks stored by a concurrent writer since the caller's existence
+        check are skipped, so each chunk is added to the index exactly once.
+        
+        Returns:
+            Number of chunks added
+        """
+        # Locks are taken in sorted order, so writers never deadlock
+        with self._filing_locks_guard:
+            locks = [
+                self._filing_locks.setdefault(filing_url, threading.Lock())
+                for filing_url in sorted({str(filing_url) for filing_url in filing_urls})
+            ]
+        with ExitStack() as stack:
+            for lock in locks:
+                stack.enter_context(lock)
+            
+            stored = set(self.collection.get(ids=ids, include=[])["ids"])
+            keep = [index for index, doc_id in enumerate(ids) if doc_id not in stored]
+            if not keep:
+                return 0
+            if len(keep) < len(ids):
+                ids = [ids[index] for index in keep]
+                embeddings = embeddings[keep]
+                texts = [texts[index] for index in keep]
+                metadatas = [metadatas[index] for index in keep]
+                filing_urls = [filing_urls[index] for index in keep]
             
-            # Add to collection
             self.collection.add(
                 embeddings=embeddings,
                 documents=texts,
                 metadatas=metadatas,
                 ids=ids
             )
+            with self._index_lock:
+                self.vector_index.add(ids, embeddings, filing_urls)
+                self._index_dirty = True
+        return len(ids)
+    
+    def _save_vector_index(self) -> None:
+        """
+        Persist the search index if it changed since the last save.
+        
+        Only the in-memory snapshot is taken under _index_lock; the disk
+        write happens outside it, so searches are not blocked by file I/O.
+        """
+        with self._index_save_lock:
+            with self._index_lock:
+                if not self._index_dirty:
+                    return
+                snapshot = self.vector_index.snapshot()
+                self._index_dirty = False
+            self.vector_index.save(snapshot)
+    
+    @staticmethod
+    def _document_id(doc: Document) -> str:
+        """
+        Build a stable, content-addressed ID for a document chunk.
+        
+        Args:
+            doc: Document chunk
+            
+        Returns:
+            Hex digest of the chunk's content and metadata
+        """
+        digest = hashlib.blake2b(doc.page_content.encode("utf-8"), digest_size=16)
+        digest.update(repr(sorted(doc.metadata.items())).encode("utf-8"))
+        return f"doc_{digest.hexdigest()}"
+    
+    async def embed_query(self, query: str) -> np.ndarray:
+        """
+        Generate a normalized embedding for a single query.
+        
+        Args:
+            query: Query text
             
-            logging.info(f"Added {len(documents)} documents to vector database")
-            return ids
+        Returns:
+            L2-normalized query embedding
+            
+        Raises:
+            AIServiceError: If embedding generation fails
+        """
+        try:
+            embedding = self._query_embeddings.get(query)
+            if embedding is None:
+                embedding = (await self._encode([query]))[0]
+                # Shared between callers, so guard against in-place edits
+                embedding.setflags(write=False)
+                self._query_embeddings[query] = embedding
+            return embedding
             
         except Exception as e:
-            raise AIServiceError(f"Failed to add documents to vector database: {str(e)}")
+            raise AIServiceError(f"Failed to embed query: {str(e)}")
+    
+    async def _encode_chunks(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed chunk texts, reusing embeddings of previously seen texts.
+        
+        Only texts missing from the on-disk embedding cache are run through
+        the model; their embeddings are added to the cache.
+        
+        Args:
+            texts: Chunk texts to embed
+            
+        Returns:
+            Array of L2-normalized float32 embeddings in the order of texts
+        """
+        keys = [self._embedding_cache_key(text) for text in texts]
+        cached = await asyncio.to_thread(self._read_chunk_embeddings, keys)
+        
+        misses = [i for i, embedding in enumerate(cached) if embedding is None]
+        if not misses:
+            return np.stack(cached)
+        
+        computed = await self._encode([texts[i] for i in misses])
+        await asyncio.to_thread(
+            self._write_chunk_embeddings, [keys[i] for i in misses], computed
+        )
+        
+        embeddings = np.empty((len(texts), computed.shape[1]), dtype=np.float32)
+        embeddings[misses] = computed
+        for i, embedding in enumerate(cached):
+            if embedding is not None:
+                embeddings[i] = embedding
+        
+        logger.info("Embedded %d chunks, %d served from cache", len(misses), len(texts) - len(misses))
+        return embeddings
+    
+    def _embedding_cache_key(self, text: str) -> str:
+        """Hash a chunk text together with the model that embeds it."""
+        digest = hashlib.sha256()
+        digest.update(f"{self.settings.embedding_backend}:{self.settings.hf_model_name}\0".encode("utf-8"))
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+    
+    def _read_chunk_embeddings(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        """Look up cached embeddings, None for each miss."""
+        with self._chunk_embeddings.transact():
+            values = [self._chunk_embeddings.get(key) for key in keys]
+        return [
+            None if value is None else np.frombuffer(value, dtype=np.float32)
+            for value in values
+        ]
+    
+    def _write_chunk_embeddings(self, keys: List[str], embeddings: np.ndarray) -> None:
+        """Store embeddings as raw float32 bytes under their cache keys."""
+        with self._chunk_embeddings.transact():
+            for key, embedding in zip(keys, embeddings):
+                self._chunk_embeddings.set(key, embedding.tobytes())
+    
+    async def _encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts on the dedicated encode executor, keeping the event loop free.
+        
+        Both backends sort texts by length and encode them in mini-batches
+        of similar length, so little work is spent on padding tokens; the
+        batch size additionally scales with the texts' length bucket.
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            Array of L2-normalized embeddings
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self._encode_executor,
+            partial(self._encode_bucketed, texts)
+        )
+    
+    def _encode_bucketed(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts bucket by bucket, each with a batch size fitting its length.
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            Array of L2-normalized float32 embeddings in the order of texts
+        """
+        estimated_tokens = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)) // CHARS_PER_TOKEN
+        buckets = np.digitize(estimated_tokens, ENCODE_BUCKET_TOKENS)
+        
+        embeddings = None
+        for bucket, multiplier in enumerate(ENCODE_BATCH_MULTIPLIERS):
+            rows = np.flatnonzero(buckets == bucket)
+            if rows.size == 0:
+                continue
+            
+            bucket_embeddings = self.embedding_model.encode(
+                [texts[row] for row in rows],
+                batch_size=max(1, int(self.embed_batch_size * multiplier)),
+                show_progress_bar=False,
+                normalize_embeddings=True,
+                convert_to_numpy=True
+            )
+            if embeddings is None:
+                embeddings = np.empty((len(texts), bucket_embeddings.shape[1]), dtype=np.float32)
+            # FP16 models return half-precision arrays; the assignment casts
+            # them to float32 on the host
+            embeddings[rows] = bucket_embeddings
+        
+        return embeddings
     
     async def similarity_search(
         self,
@@ -146,49 +604,172 @@ class VectorManager:
         Raises:
             AIServiceError: If search fails
         """
-        if not self.embedding_model or not self.collection:
-            await self.initialize()
-            
         try:
             # Generate query embedding
-            query_embedding = self.embedding_model.encode(
-                [query],
-                normalize_embeddings=True
-            ).tolist()[0]
+            query_embedding = await self.embed_query(query)
+            
+            cache_bucket = ("similarity", top_k, repr(filter_metadata))
+            cached_results = self._retrieval_cache.get(cache_bucket, query_embedding)
+            if cached_results is not None:
+                return list(cached_results)
             
             # Perform search
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=top_k,
-                where=filter_metadata
+            texts, metadatas, scores, _ = await asyncio.to_thread(
+                self._query_nearest, query_embedding, top_k, filter_metadata
             )
             
-            # Convert results to Document objects with scores
-            documents_with_scores = []
+            # Convert results to Document objects with scores; both search
+            # paths already rank them best first
+            documents_with_scores = [
+                (Document(page_content=text, metadata=metadata or {}), float(score))
+                for text, metadata, score in zip(texts, metadatas, scores.tolist())
+            ]
             
-            if results['documents'] and results['documents'][0]:
-                for i in range(len(results['documents'][0])):
-                    # Reconstruct document
-                    doc = Document(
-                        page_content=results['documents'][0][i],
-                        metadata=results['metadatas'][0][i] if results['metadatas'] else {}
-                    )
-                    
-                    # Calculate similarity score (ChromaDB returns distances, convert to similarity)
-                    distance = results['distances'][0][i] if results['distances'] else 1.0
-                    similarity_score = 1.0 - distance  # Convert distance to similarity
-                    
-                    documents_with_scores.append((doc, similarity_score))
-            
-            # Sort by similarity score (highest first)
-            documents_with_scores.sort(key=lambda x: x[1], reverse=True)
+            self._retrieval_cache.put(cache_bucket, query_embedding, tuple(documents_with_scores))
             
-            logging.info(f"Found {len(documents_with_scores)} relevant documents for query")
+            logger.info("Found %d relevant documents for query", len(documents_with_scores))
             return documents_with_scores
             
         except Exception as e:
             raise AIServiceError(f"Failed to perform similarity search: {str(e)}")
     
+    async def max_marginal_relevance_search(
+        self,
+        query_embedding: np.ndarray,
+        k: int = 5,
+        fetch_k: int = 8,
+        lambda_mult: float = 0.5,
+        score_threshold: float = 0.0,
+        filter_metadata: Optional[Dict[str, str]] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Select relevant yet diverse document chunks for a query.
+        
+        The ``fetch_k`` nearest chunks are retrieved with their embeddings,
+        chunks scoring at or below ``score_threshold`` are dropped, and
+        Maximal Marginal Relevance picks ``k`` of the rest so near-duplicate
+        neighbouring chunks don't crowd out other relevant passages.
+        
+        Args:
+            query_embedding: Normalized query embedding
+            k: Number of chunks to select
+            fetch_k: Number of nearest chunks to choose from
+            lambda_mult: Trade-off between relevance (1.0) and diversity (0.0)
+            score_threshold: Minimum similarity score for a chunk to be considered
+            filter_metadata: Optional metadata filters
+            
+        Returns:
+            List of (document, similarity_score) tuples in selection order; the
+            score is also stored as ``similarity_score`` in each document's metadata
+            
+        Raises:
+            AIServiceError: If search fails
+        """
+        try:
+            cache_bucket = ("mmr", k, fetch_k, lambda_mult, score_threshold, repr(filter_metadata))
+            cached_results = self._retrieval_cache.get(cache_bucket, query_embedding)
+            if cached_results is not None:
+                return list(cached_results)
+            
+            texts, metadatas, scores, embeddings = await asyncio.to_thread(
+                self._query_nearest, query_embedding, fetch_k, filter_metadata, include_embeddings=True
+            )
+            if not texts:
+                return []
+            
+            # Filter candidates by similarity in one pass
+            keep = np.flatnonzero(scores > score_threshold)
+            if keep.size == 0:
+                return []
+            
+            embeddings = embeddings[keep]
+            selected = maximal_marginal_relevance(
+                np.asarray(query_embedding, dtype=np.float32),
+                embeddings,
+                lambda_mult=lambda_mult,
+                k=min(k, keep.size)
+            )
+            
+            documents_with_scores = []
+            for candidate in selected:
+                index = int(keep[candidate])
+                similarity_score = float(scores[index])
+                metadata = dict(metadatas[index] or {})
+                metadata["similarity_score"] = similarity_score
+                documents_with_scores.append((
+                    Document(page_content=texts[index], metadata=metadata),
+                    similarity_score
+                ))
+            
+            self._retrieval_cache.put(cache_bucket, query_embedding, tuple(documents_with_scores))
+            
+            logger.info("Selected %d of %d relevant documents with MMR", len(selected), keep.size)
+            return documents_with_scores
+            
+        except Exception as e:
+            raise AIServiceError(f"Failed to perform MMR search: {str(e)}")
+    
+    def _query_nearest(
+        self,
+        query_embedding: np.ndarray,
+        n_results: int,
+        filter_metadata: Optional[Dict[str, str]] = None,
+        include_embeddings: bool = False
+    ) -> Tuple[List[str], List[Dict[str, Any]], np.ndarray, Optional[np.ndarray]]:
+        """
+        Find the stored chunks nearest to a query embedding.
+        
+        Unfiltered and per-filing searches run on the int8 index and only
+        fetch the matching chunks from ChromaDB; other metadata filters are
+        left to a ChromaDB query. Blocking; callers run it in a worker thread.
+        
+        Args:
+            query_embedding: Normalized query embedding
+            n_results: Number of chunks to return
+            filter_metadata: Optional metadata filters
+            include_embeddings: Whether to return the chunks' embeddings
+            
+        Returns:
+            Tuple of chunk texts, metadatas, similarity scores (best first)
+            and, if requested, the embeddings as a float32 matrix
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        
+        if not filter_metadata or set(filter_metadata) == {"filing_url"}:
+            with self._index_lock:
+                hits = self.vector_index.search(query, n_results, (filter_metadata or {}).get("filing_url"))
+            stored = self.collection.get(ids=[doc_id for doc_id, _ in hits], include=include) if hits else None
+            if not stored or not stored["ids"]:
+                return [], [], np.empty(0, dtype=np.float32), None
+            
+            # ChromaDB does not return chunks in the requested order
+            position = {doc_id: i for i, doc_id in enumerate(stored["ids"])}
+            hits = [(position[doc_id], score) for doc_id, score in hits if doc_id in position]
+            rows = [row for row, _ in hits]
+            
+            # Report scores on the same scale as ChromaDB's default squared
+            # L2 space (1 - distance), which for unit vectors is 2 * cos - 1
+            scores = 2.0 * np.asarray([score for _, score in hits], dtype=np.float32) - 1.0
+            texts = [stored["documents"][row] for row in rows]
+            metadatas = [stored["metadatas"][row] for row in rows]
+            embeddings = np.asarray(stored["embeddings"], dtype=np.float32)[rows] if include_embeddings else None
+            return texts, metadatas, scores, embeddings
+        
+        results = self.collection.query(
+            query_embeddings=query[np.newaxis, :],
+            n_results=n_results,
+            where=filter_metadata,
+            include=include + ["distances"]
+        )
+        if not results["documents"] or not results["documents"][0]:
+            return [], [], np.empty(0, dtype=np.float32), None
+        
+        # ChromaDB returns distances; convert them to similarities
+        scores = 1.0 - np.asarray(results["distances"][0], dtype=np.float32)
+        embeddings = np.asarray(results["embeddings"][0], dtype=np.float32) if include_embeddings else None
+        return results["documents"][0], results["metadatas"][0], scores, embeddings
+    
     async def get_collection_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the vector database collection.
@@ -200,7 +781,7 @@ class VectorManager:
             await self.initialize()
             
         try:
-            count = self.collection.count()
+            count = await asyncio.to_thread(self.collection.count)
             
             return {
                 "total_documents": count,
@@ -210,7 +791,7 @@ class VectorManager:
             }
             
         except Exception as e:
-            logging.warning(f"Failed to get collection stats: {str(e)}")
+            logger.warning("Failed to get collection stats: %s", e)
             return {"error": str(e)}
     
     async def clear_collection(self):
@@ -223,15 +804,31 @@ class VectorManager:
             await self.initialize()
             
         try:
-            # Get all IDs and delete them
-            all_results = self.collection.get()
-            if all_results['ids']:
-                self.collection.delete(ids=all_results['ids'])
+            await asyncio.to_thread(self._delete_all_chunks)
+            self._retrieval_cache.clear()
             
-            logging.info("Cleared vector database collection")
+            logger.info("Cleared vector database collection")
             
         except Exception as e:
-            logging.warning(f"Failed to clear collection: {str(e)}")
+            logger.warning("Failed to clear collection: %s", e)
+    
+    def _delete_all_chunks(self) -> None:
+        """Empty ChromaDB and the search index; blocking, run in a worker thread."""
+        # Get all IDs without document or embedding payloads and delete
+        # them in bounded batches
+        all_ids = self.collection.get(include=[])['ids']
+        for start in range(0, len(all_ids), CLEAR_BATCH_SIZE):
+            self.collection.delete(ids=all_ids[start:start + CLEAR_BATCH_SIZE])
+        with self._index_lock:
+            self.vector_index.reset()
+            self._index_dirty = True
+        self._save_vector_index()
+    
+    def close(self) -> None:
+        """Stop the encode executor once in-flight embeddings finish and persist the search index."""
+        self._encode_executor.shutdown(wait=True)
+        if self.vector_index is not None:
+            self._save_vector_index()
     
     def get_embedding_model_info(self) -> Dict[str, Any]:
         """
@@ -260,6 +857,10 @@ class VectorManager:
         Returns:
             Health status dictionary
         """
+        return await asyncio.to_thread(self._check_health)
+    
+    def _check_health(self) -> Dict[str, Any]:
+        """Run the health checks; blocking, run in a worker thread."""
         status = {
             "embedding_model": "unknown",
             "vector_database": "unknown",
@@ -267,20 +868,26 @@ class VectorManager:
         }
         
         try:
-            # Check embedding model
+            # Check embedding model against the search index by its declared
+            # dimension; running a forward pass on every probe would compete
+            # with real requests
             if self.embedding_model:
-                # Test embedding generation
-                test_embedding = self.embedding_model.encode(["test"], normalize_embeddings=True)
-                if len(test_embedding) > 0:
+                dimension = self.embedding_model.get_sentence_embedding_dimension()
+                if not dimension or self.vector_index is None:
+                    status["embedding_model"] = "loaded"
+                elif dimension == self.vector_index.dimension:
                     status["embedding_model"] = "healthy"
                 else:
-                    status["embedding_model"] = "error"
+                    status["embedding_model"] = (
+                        f"error (dimension {dimension} does not match "
+                        f"search index dimension {self.vector_index.dimension})"
+                    )
             else:
                 status["embedding_model"] = "not_initialized"
                 
             # Check vector database
             if self.chroma_client:
-                collections = self.chroma_client.list_collections()
+                self.chroma_client.heartbeat()
                 status["vector_database"] = "healthy"
             else:
                 status["vector_database"] = "not_initialized"
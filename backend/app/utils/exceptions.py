@@ -5,7 +5,8 @@ This module defines domain-specific exceptions that provide clear error handling
 and demonstrate professional exception management practices.
 """
 
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import Optional, Dict, Any, Type
 
 
 class AnalyzerBaseException(Exception):
@@ -237,15 +238,26 @@ def get_http_status_code(exception: Exception) -> int:
     Returns:
         int: Appropriate HTTP status code
     """
-    exception_type = type(exception)
+    return _status_code_for_type(type(exception))
+
+
+@lru_cache(maxsize=64)
+def _status_code_for_type(exception_type: Type[BaseException]) -> int:
+    """
+    Resolve the HTTP status code for an exception class.
     
-    # Check for exact type match first
-    if exception_type in EXCEPTION_HTTP_MAPPING:
-        return EXCEPTION_HTTP_MAPPING[exception_type]
+    Walks the method resolution order so the most specific mapped base
+    class wins; the result is cached per class.
     
-    # Check for inheritance
-    for exc_type, status_code in EXCEPTION_HTTP_MAPPING.items():
-        if isinstance(exception, exc_type):
+    Args:
+        exception_type: The exception class to map
+        
+    Returns:
+        int: Appropriate HTTP status code
+    """
+    for cls in exception_type.__mro__:
+        status_code = EXCEPTION_HTTP_MAPPING.get(cls)
+        if status_code is not None:
             return status_code
     
     # Default to 500 for unknown exceptions
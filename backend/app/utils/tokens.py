@@ -0,0 +1,23 @@
+"""
+Token estimation helpers for prompt budgeting.
+
+Gemini's tokenizer isn't available offline, so prompt sizes are estimated
+from character counts. English financial text averages roughly four
+characters per token.
+"""
+
+# Average number of characters per Gemini token for English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text.
+    
+    Args:
+        text: Text to measure
+        
+    Returns:
+        Estimated token count, rounded up
+    """
+    return -(-len(text) // CHARS_PER_TOKEN)
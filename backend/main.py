@@ -5,14 +5,20 @@ This application demonstrates Generative AI capabilities for analyzing SEC filin
 showcasing skills for Junior Generative AI Developer positions.
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 import os
+import sys
 from dotenv import load_dotenv
 
 from app.api.routes import analyzer
+from app.api.routes.analyzer import warm_up_analyzer_service
 from app.core.config import get_settings
+from app.core.logging_config import setup_logging, shutdown_logging
+from app.services.ai_service import warm_up_gemini
+from app.services.document_processor import create_http_client
 
 # Load environment variables
 load_dotenv()
@@ -20,13 +26,42 @@ load_dotenv()
 # Get application settings
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Manage resources shared by all requests.
+    
+    A single pooled HTTP client is opened at startup so SEC fetches reuse
+    keep-alive connections, and it is closed on shutdown. The OpenAPI
+    schema is generated up front so the first docs request doesn't pay
+    for it. Logging is routed through a background queue listener, and
+    the shared Gemini client is created and warmed up before serving.
+    The embedding model and vector database are loaded before the port
+    opens, so the first request doesn't pay for them.
+    """
+    setup_logging(debug=settings.debug)
+    app.state.http_client = create_http_client(settings)
+    app.openapi_schema = app.openapi()
+    if settings.gemini_warmup:
+        await warm_up_gemini(settings)
+    analyzer_service = await warm_up_analyzer_service(app.state.http_client)
+    try:
+        yield
+    finally:
+        await analyzer_service.aclose()
+        await app.state.http_client.aclose()
+        shutdown_logging()
+
+
 # Create FastAPI application
 app = FastAPI(
     title="AI SEC Filing Analyzer",
     description="A demonstration of Generative AI capabilities for SEC filing analysis",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS for frontend integration
@@ -104,5 +139,8 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        # uvloop has cheaper scheduling for this I/O-bound app; not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
     ) 
\ No newline at end of file
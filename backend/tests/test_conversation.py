@@ -0,0 +1,56 @@
+"""Tests for the sliding-window conversation state."""
+
+from app.services.conversation import ConversationState
+from app.utils.tokens import estimate_tokens
+
+
+def test_render_keeps_turns_in_order():
+    conversation = ConversationState(window_tokens=1000)
+    conversation.add_turn("What were total revenues?", "$391.0 billion.")
+    conversation.add_turn("And net income?", "$93.7 billion.")
+
+    assert conversation.render() == (
+        "Q: What were total revenues?\nA: $391.0 billion.\n"
+        "\n"
+        "Q: And net income?\nA: $93.7 billion.\n"
+    )
+    assert len(conversation) == 2
+
+
+def test_empty_history_renders_empty_string():
+    assert ConversationState().render() == ""
+
+
+def test_oldest_turns_are_trimmed_to_the_window():
+    turn_tokens = estimate_tokens("Q: question 0\nA: answer 0\n")
+    conversation = ConversationState(window_tokens=turn_tokens * 2)
+
+    for i in range(5):
+        conversation.add_turn(f"question {i}", f"answer {i}")
+
+    assert len(conversation) == 2
+    assert conversation.total_tokens <= conversation.window_tokens
+    assert "question 0" not in conversation.render()
+    assert conversation.render().startswith("Q: question 3")
+
+
+def test_total_tokens_matches_retained_turns():
+    conversation = ConversationState(window_tokens=50)
+
+    for i in range(10):
+        conversation.add_turn(f"question number {i}", "a fairly long answer " * (i % 3 + 1))
+
+    expected = sum(estimate_tokens(turn.text) for turn in conversation._turns)
+    assert conversation.total_tokens == expected
+    assert conversation.total_tokens <= conversation.window_tokens
+
+
+def test_turn_larger_than_window_is_truncated_and_kept():
+    conversation = ConversationState(window_tokens=20)
+    conversation.add_turn("What were total revenues?", "$391.0 billion.")
+    conversation.add_turn("What are the main risk factors?", "A very long answer " * 20)
+
+    assert len(conversation) == 1
+    assert conversation.total_tokens <= conversation.window_tokens
+    assert conversation.render().startswith("Q: What are the main risk factors?")
+    assert conversation.render().endswith("...\n")
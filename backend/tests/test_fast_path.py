@@ -0,0 +1,118 @@
+"""Tests for the extractive fast path."""
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services.fast_path import extract_answer
+
+
+CHANGE_CHUNK = (
+    "Total net sales increased 2% or $7.8 billion during 2024 compared to 2023. "
+    "Net income decreased by $3.0 billion."
+)
+
+REPORTED_CHUNK = (
+    "Total net sales were $391.0 billion for 2024. "
+    "Net income was $93.7 billion. "
+    "Diluted earnings per share were $6.08. "
+    "Cash and cash equivalents totaled $29.9 billion."
+)
+
+QUARTERLY_CHUNK = (
+    "Total net sales were $85.8 billion for the third quarter of 2024. "
+    "Net income for Q3 2024 was $21.4 billion."
+)
+
+COMPARATIVE_CHUNK = "Net income was $93.7 billion in 2024 compared to $97.0 billion in 2023."
+
+
+def _answer(question, chunk):
+    return extract_answer(question, [Document(page_content=chunk)])
+
+
+@pytest.mark.parametrize("question, amount", [
+    ("What were total revenues?", "$391.0 billion"),
+    ("What were Apple's total net sales in fiscal 2024?", "$391.0 billion"),
+    ("What were total revenues for FY24?", "$391.0 billion"),
+    ("What was net income for the reporting period?", "$93.7 billion"),
+    ("What were the earnings per share for this period?", "$6.08"),
+    ("What is the company's current cash and cash equivalents?", "$29.9 billion"),
+])
+def test_canonical_questions_are_answered(question, amount):
+    result = _answer(question, REPORTED_CHUNK)
+
+    assert result is not None
+    assert amount in result.answer
+
+
+@pytest.mark.parametrize("question", [
+    "What risks could affect revenue growth next year?",
+    "Why did net income decline compared to last year?",
+    "How does revenue compare with operating expenses?",
+    "What was net income excluding the impairment charge?",
+])
+def test_non_canonical_questions_fall_through(question):
+    assert _answer(question, REPORTED_CHUNK) is None
+
+
+@pytest.mark.parametrize("question, amount", [
+    ("What were the total revenues for Q3 2024?", "$85.8 billion"),
+    ("What were total net sales during the third quarter of 2024?", "$85.8 billion"),
+    ("What was net income for the third quarter of fiscal 2024?", "$21.4 billion"),
+])
+def test_quarterly_questions_match_the_stated_quarter(question, amount):
+    result = _answer(question, QUARTERLY_CHUNK)
+
+    assert result is not None
+    assert amount in result.answer
+
+
+@pytest.mark.parametrize("question, chunk", [
+    ("What was net income in 2019?", REPORTED_CHUNK),
+    ("What were total revenues for Q3 2022?", REPORTED_CHUNK),
+    ("What were the total revenues for Q3 2024?", REPORTED_CHUNK),
+    ("What were total revenues for fiscal 2023?", REPORTED_CHUNK),
+    ("What were total revenues for Q2 2024?", QUARTERLY_CHUNK),
+    ("What was net income in 2023?", COMPARATIVE_CHUNK),
+])
+def test_mismatched_periods_fall_through(question, chunk):
+    assert _answer(question, chunk) is None
+
+
+@pytest.mark.parametrize("question", [
+    "What was net income for the segment in Europe during 2024?",
+    "What were total revenues in Europe?",
+    "What were total revenues for the Americas segment?",
+    "What were total revenues excluding services in 2024?",
+    "What was net income in 2024 excluding the tax charge?",
+])
+def test_qualified_questions_fall_through(question):
+    assert _answer(question, REPORTED_CHUNK) is None
+
+
+@pytest.mark.parametrize("question", [
+    "What were total revenues?",
+    "What was net income?",
+])
+def test_changes_are_not_reported_as_values(question):
+    assert _answer(question, CHANGE_CHUNK) is None
+
+
+def test_reported_value_after_change_is_used():
+    chunk = "Total net sales increased 2% to $391.0 billion. Total net sales were $391.0 billion."
+
+    result = _answer("What were total net sales?", chunk)
+
+    assert result is not None
+    assert "$391.0 billion" in result.answer
+
+
+def test_no_documents():
+    assert extract_answer("What were total revenues?", []) is None
+
+
+def test_period_of_the_matched_amount_is_used():
+    result = _answer("What was net income in 2024?", COMPARATIVE_CHUNK)
+
+    assert result is not None
+    assert "$93.7 billion" in result.answer
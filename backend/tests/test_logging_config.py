@@ -0,0 +1,37 @@
+"""Tests for the queued logging setup."""
+
+import logging
+import logging.handlers
+
+from app.core.logging_config import setup_logging, shutdown_logging
+
+
+def _queue_handlers():
+    return [
+        handler for handler in logging.getLogger().handlers
+        if isinstance(handler, logging.handlers.QueueHandler)
+    ]
+
+
+def test_shutdown_removes_the_queue_handler():
+    before = len(_queue_handlers())
+    setup_logging()
+    assert len(_queue_handlers()) == before + 1
+
+    shutdown_logging()
+
+    assert len(_queue_handlers()) == before
+
+
+def test_restart_does_not_stack_handlers():
+    before = len(_queue_handlers())
+
+    for _ in range(3):
+        setup_logging()
+        shutdown_logging()
+    setup_logging()
+
+    try:
+        assert len(_queue_handlers()) == before + 1
+    finally:
+        shutdown_logging()
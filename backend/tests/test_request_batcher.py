@@ -0,0 +1,124 @@
+"""Tests for the request batcher."""
+
+import asyncio
+
+import pytest
+
+from app.models.schemas import AnalysisRequest
+from app.services.request_batcher import AnalysisBatcher
+
+
+FILING_URL = "https://www.sec.gov/Archives/edgar/data/320193/000032019324000081/aapl-20240630.htm"
+OTHER_FILING_URL = "https://www.sec.gov/Archives/edgar/data/789019/000095017024087843/msft-20240630.htm"
+
+
+class FakeAnalyzer:
+    """Analyzer that answers each question with its own text."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.single_calls = []
+        self.batch_calls = []
+
+    async def analyze_filing(self, filing_url, question, **kwargs):
+        self.single_calls.append((filing_url, question))
+        if self.fail:
+            raise RuntimeError("analysis failed")
+        return f"answer: {question}"
+
+    async def analyze_filing_batch(self, filing_url, questions, **kwargs):
+        self.batch_calls.append((filing_url, list(questions)))
+        if self.fail:
+            raise RuntimeError("analysis failed")
+        await asyncio.sleep(0)
+        return [f"answer: {question}" for question in questions]
+
+
+def _request(question, filing_url=FILING_URL, **kwargs):
+    return AnalysisRequest(filing_url=filing_url, question=question, **kwargs)
+
+
+def _process_all(batcher, requests):
+    async def run():
+        return await asyncio.gather(
+            *(batcher.process(request) for request in requests),
+            return_exceptions=True
+        )
+
+    return asyncio.run(run())
+
+
+def test_concurrent_requests_are_batched_in_order():
+    analyzer = FakeAnalyzer()
+    batcher = AnalysisBatcher(analyzer, max_batch_size=8, max_queue_time=0.01)
+    questions = [f"What was question number {i}?" for i in range(5)]
+
+    results = _process_all(batcher, [_request(question) for question in questions])
+
+    assert results == [f"answer: {question}" for question in questions]
+    assert analyzer.batch_calls == [(FILING_URL, questions)]
+    assert analyzer.single_calls == []
+
+
+def test_lone_request_uses_single_analysis():
+    analyzer = FakeAnalyzer()
+    batcher = AnalysisBatcher(analyzer, max_queue_time=0.01)
+
+    results = _process_all(batcher, [_request("What were total revenues?")])
+
+    assert results == ["answer: What were total revenues?"]
+    assert analyzer.single_calls == [(FILING_URL, "What were total revenues?")]
+    assert analyzer.batch_calls == []
+
+
+def test_full_batches_are_split_by_max_batch_size():
+    analyzer = FakeAnalyzer()
+    batcher = AnalysisBatcher(analyzer, max_batch_size=2, max_queue_time=0.01)
+    questions = [f"What was question number {i}?" for i in range(5)]
+
+    results = _process_all(batcher, [_request(question) for question in questions])
+
+    assert results == [f"answer: {question}" for question in questions]
+    assert [batch for _, batch in analyzer.batch_calls] == [questions[0:2], questions[2:4]]
+    assert analyzer.single_calls == [(FILING_URL, questions[4])]
+
+
+def test_requests_with_different_options_are_not_batched():
+    analyzer = FakeAnalyzer()
+    batcher = AnalysisBatcher(analyzer, max_queue_time=0.01)
+    requests = [
+        _request("What were total revenues?"),
+        _request("What were total revenues?", filing_url=OTHER_FILING_URL),
+        _request("What were total revenues?", include_context=False),
+    ]
+
+    results = _process_all(batcher, requests)
+
+    assert results == ["answer: What were total revenues?"] * 3
+    assert len(analyzer.single_calls) == 3
+    assert analyzer.batch_calls == []
+
+
+def test_failure_is_raised_to_every_request_in_the_batch():
+    analyzer = FakeAnalyzer(fail=True)
+    batcher = AnalysisBatcher(analyzer, max_queue_time=0.01)
+
+    results = _process_all(batcher, [
+        _request("What were total revenues?"),
+        _request("What was net income?"),
+    ])
+
+    assert len(results) == 2
+    for result in results:
+        assert isinstance(result, RuntimeError)
+
+
+@pytest.mark.parametrize("max_batch_size", [1, 3])
+def test_every_request_is_answered(max_batch_size):
+    analyzer = FakeAnalyzer()
+    batcher = AnalysisBatcher(analyzer, max_batch_size=max_batch_size, max_queue_time=0.01)
+    questions = [f"What was question number {i}?" for i in range(7)]
+
+    results = _process_all(batcher, [_request(question) for question in questions])
+
+    assert results == [f"answer: {question}" for question in questions]
@@ -0,0 +1,80 @@
+"""Tests for the semantic cache."""
+
+import numpy as np
+
+from app.services.semantic_cache import SemanticCache
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _rotated(base, other, similarity):
+    """Unit vector with the given cosine similarity to base, in the plane of base and other."""
+    return similarity * base + np.sqrt(1.0 - similarity ** 2) * other
+
+
+BASE = _unit([1.0, 0.0, 0.0, 0.0])
+ORTHOGONAL = _unit([0.0, 1.0, 0.0, 0.0])
+
+
+def test_miss_on_empty_bucket():
+    cache = SemanticCache(similarity_threshold=0.95)
+
+    assert cache.get("filing", BASE) is None
+
+
+def test_hit_above_threshold():
+    cache = SemanticCache(similarity_threshold=0.95)
+    cache.put("filing", BASE, "cached answer")
+
+    assert cache.get("filing", _rotated(BASE, ORTHOGONAL, 0.97)) == "cached answer"
+
+
+def test_miss_below_threshold():
+    cache = SemanticCache(similarity_threshold=0.95)
+    cache.put("filing", BASE, "cached answer")
+
+    assert cache.get("filing", _rotated(BASE, ORTHOGONAL, 0.90)) is None
+
+
+def test_embeddings_are_normalized():
+    cache = SemanticCache(similarity_threshold=0.95)
+    cache.put("filing", BASE * 3.0, "cached answer")
+
+    assert cache.get("filing", BASE * 0.5) == "cached answer"
+
+
+def test_closest_entry_wins():
+    cache = SemanticCache(similarity_threshold=0.9)
+    cache.put("filing", BASE, "first")
+    cache.put("filing", _rotated(BASE, ORTHOGONAL, 0.92), "second")
+
+    assert cache.get("filing", _rotated(BASE, ORTHOGONAL, 0.93)) == "second"
+
+
+def test_buckets_are_isolated():
+    cache = SemanticCache(similarity_threshold=0.95)
+    cache.put("filing-a", BASE, "answer a")
+
+    assert cache.get("filing-b", BASE) is None
+
+
+def test_oldest_entries_are_dropped_when_bucket_is_full():
+    cache = SemanticCache(similarity_threshold=0.99, max_entries_per_bucket=2)
+    vectors = [_unit(np.eye(4)[i]) for i in range(3)]
+    for i, vector in enumerate(vectors):
+        cache.put("filing", vector, i)
+
+    assert cache.get("filing", vectors[0]) is None
+    assert cache.get("filing", vectors[1]) == 1
+    assert cache.get("filing", vectors[2]) == 2
+
+
+def test_clear():
+    cache = SemanticCache(similarity_threshold=0.95)
+    cache.put("filing", BASE, "cached answer")
+    cache.clear()
+
+    assert cache.get("filing", BASE) is None
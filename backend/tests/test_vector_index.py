@@ -0,0 +1,107 @@
+"""Tests for the int8 FAISS search index."""
+
+import numpy as np
+import pytest
+
+from app.services.vector_index import QuantizedVectorIndex
+
+
+DIMENSION = 32
+
+
+def _normalized(rng, n):
+    vectors = rng.standard_normal((n, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def populated(tmp_path):
+    rng = np.random.default_rng(0)
+    embeddings = _normalized(rng, 40)
+    ids = [f"doc_{i}" for i in range(40)]
+    filing_urls = ["filing-a" if i % 2 == 0 else "filing-b" for i in range(40)]
+
+    index = QuantizedVectorIndex(DIMENSION, str(tmp_path))
+    index.add(ids, embeddings, filing_urls)
+    return index, ids, embeddings, filing_urls
+
+
+def test_search_finds_the_stored_vector(populated):
+    index, ids, embeddings, _ = populated
+
+    hits = index.search(embeddings[7], 3)
+
+    assert len(hits) == 3
+    assert hits[0][0] == ids[7]
+    assert hits[0][1] == pytest.approx(1.0, abs=0.02)
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+
+
+def test_filtered_search_only_returns_the_filing(populated):
+    index, ids, embeddings, filing_urls = populated
+    filing_ids = {doc_id for doc_id, url in zip(ids, filing_urls) if url == "filing-b"}
+
+    hits = index.search(embeddings[4], 5, filing_url="filing-b")
+
+    assert len(hits) == 5
+    assert {doc_id for doc_id, _ in hits} <= filing_ids
+    assert index.search(embeddings[4], 5, filing_url="filing-a")[0][0] == ids[4]
+
+
+def test_filtered_search_of_unknown_filing_is_empty(populated):
+    index, _, embeddings, _ = populated
+
+    assert index.search(embeddings[0], 5, filing_url="unknown") == []
+
+
+def test_k_is_capped_at_the_number_of_vectors(populated):
+    index, ids, embeddings, _ = populated
+
+    assert len(index.search(embeddings[0], 100)) == len(ids)
+    assert len(index.search(embeddings[0], 100, filing_url="filing-a")) == len(ids) // 2
+
+
+def test_save_and_load_round_trip(populated, tmp_path):
+    index, ids, embeddings, _ = populated
+    index.save()
+
+    loaded = QuantizedVectorIndex(DIMENSION, str(tmp_path))
+
+    assert loaded.load()
+    assert len(loaded) == len(ids)
+    assert loaded.search(embeddings[11], 4) == index.search(embeddings[11], 4)
+    assert loaded.search(embeddings[11], 4, filing_url="filing-b") == (
+        index.search(embeddings[11], 4, filing_url="filing-b")
+    )
+
+
+def test_snapshot_is_not_affected_by_later_adds(populated, tmp_path):
+    index, ids, _, _ = populated
+    snapshot = index.snapshot()
+    index.add(["doc_new"], _normalized(np.random.default_rng(1), 1), ["filing-a"])
+    index.save(snapshot)
+
+    loaded = QuantizedVectorIndex(DIMENSION, str(tmp_path))
+
+    assert loaded.load()
+    assert len(loaded) == len(ids)
+
+
+def test_load_without_saved_index(tmp_path):
+    assert not QuantizedVectorIndex(DIMENSION, str(tmp_path)).load()
+
+
+def test_load_rejects_other_dimension(populated, tmp_path):
+    index, _, _, _ = populated
+    index.save()
+
+    assert not QuantizedVectorIndex(DIMENSION * 2, str(tmp_path)).load()
+
+
+def test_reset(populated):
+    index, _, embeddings, _ = populated
+    index.reset()
+
+    assert len(index) == 0
+    assert index.search(embeddings[0], 5) == []
+    assert index.search(embeddings[0], 5, filing_url="filing-a") == []